@@ -4,44 +4,126 @@ import os
 
 
 
-def parse_sample_response(sample):
-    if isinstance(sample, dict):
-        parsed = {}
-        for key, value in sample.items():
-            if value is None:
-                parsed[key] = None  # Allow None values
-            elif isinstance(value, bool):
-                parsed[key] = "bool"
-            elif isinstance(value, str):
-                parsed[key] = "string"
-            elif isinstance(value, int):
-                parsed[key] = "int"
-            elif isinstance(value, float):
-                parsed[key] = "float"
-            elif isinstance(value, list):
-                if not value:
-                    parsed[key] = []  # Empty list
-                else:
-                    if isinstance(value[0], dict):
-                        parsed[key] = [parse_sample_response(value[0])]
-                    elif isinstance(value[0], str):
-                        parsed[key] = ["string"]  # Handle lists of strings
-                    else:
-                        parsed[key] = ["unknown"]
-            elif isinstance(value, dict):
-                parsed[key] = parse_sample_response(value)
-            else:
-                parsed[key] = "unknown"
-        return parsed
-    elif isinstance(sample, list):
-        if not sample:
-            return []
-        elif isinstance(sample[0], dict):
-            return [parse_sample_response(sample[0])]
-        else:
-            return ["string"] if isinstance(sample[0], str) else ["unknown"]
+# Schema inference. A sample is consumed as a stream of ijson-style parse
+# events, so big captured responses never have to be held in memory when
+# ijson is installed. All items of a list are merged into one schema: keys
+# must appear in every item to be kept, nulls take the type seen elsewhere,
+# and conflicting types become None (any value is accepted).
+NO_INFO = object()   # only nulls seen so far
+ANY = object()       # conflicting types
+NOTHING = object()   # no list items seen yet
+
+SCALAR_TYPES = {
+    'string': 'string',
+    'boolean': 'bool',
+    'integer': 'int',
+    'double': 'float',
+}
+
+
+def iter_events(value):
+    # Parse events for an in-memory value, matching ijson.basic_parse.
+    if isinstance(value, dict):
+        yield 'start_map', None
+        for key, item in value.items():
+            yield 'map_key', key
+            yield from iter_events(item)
+        yield 'end_map', None
+    elif isinstance(value, list):
+        yield 'start_array', None
+        for item in value:
+            yield from iter_events(item)
+        yield 'end_array', None
+    elif value is None:
+        yield 'null', None
+    elif isinstance(value, bool):
+        yield 'boolean', value
+    elif isinstance(value, str):
+        yield 'string', value
+    elif isinstance(value, int):
+        yield 'integer', value
     else:
-        return "unknown"
+        yield 'double', value
+
+
+def merge_schemas(a, b):
+    if a is NO_INFO:
+        return b
+    if b is NO_INFO:
+        return a
+    if a is ANY or b is ANY:
+        return ANY
+    if isinstance(a, dict) and isinstance(b, dict):
+        return {key: merge_schemas(a[key], b[key]) for key in a if key in b}
+    if isinstance(a, list) and isinstance(b, list):
+        if not a or not b:
+            return a or b
+        return [merge_schemas(a[0], b[0])]
+    return a if a == b else ANY
+
+
+def infer_schema(events):
+    stack = []  # frames: [schema dict, current key] for maps, [merged item] for arrays
+    result = NOTHING
+
+    for event, value in events:
+        if event == 'start_map':
+            stack.append([{}, None])
+            continue
+        if event == 'map_key':
+            stack[-1][1] = value
+            continue
+        if event == 'start_array':
+            stack.append([NOTHING])
+            continue
+        if event == 'end_map':
+            node = stack.pop()[0]
+        elif event == 'end_array':
+            item = stack.pop()[0]
+            node = [] if item is NOTHING else [item]
+        elif event == 'null':
+            node = NO_INFO
+        elif event == 'number':
+            node = 'int' if isinstance(value, int) else 'float'
+        else:
+            node = SCALAR_TYPES.get(event, 'unknown')
+
+        if not stack:
+            result = node
+        elif len(stack[-1]) == 2:
+            stack[-1][0][stack[-1][1]] = node
+        else:
+            stack[-1][0] = node if stack[-1][0] is NOTHING else merge_schemas(stack[-1][0], node)
+
+    return finalize_schema(result)
+
+
+def finalize_schema(schema):
+    if schema is NO_INFO or schema is ANY or schema is NOTHING:
+        return None
+    if isinstance(schema, dict):
+        return {key: finalize_schema(value) for key, value in schema.items()}
+    if isinstance(schema, list):
+        return [finalize_schema(item) for item in schema]
+    return schema
+
+
+def parse_sample_response(sample):
+    return infer_schema(iter_events(sample))
+
+
+def parse_sample_file(sample_output_file):
+    # Streams the file through ijson when available; otherwise loads it whole.
+    try:
+        import ijson
+    except ImportError:
+        with open(sample_output_file, 'r') as f:
+            return parse_sample_response(json.load(f))
+    with open(sample_output_file, 'rb') as f:
+        try:
+            return infer_schema(ijson.basic_parse(f))
+        except ijson.JSONError as e:
+            raise ValueError(str(e)) from e
 
 
 
@@ -56,9 +138,7 @@ def read_credentials(api_token_path='~/ir/.ir_user_token', instance_domain_path=
 
 
 
-def add_endpoint_to_queries(name, method, url, sample_structure, instance_domain, filename='apiChecker.json'):
-    parsed_structure = parse_sample_response(sample_structure)
-
+def add_endpoint_to_queries(name, method, url, parsed_structure, instance_domain, filename='apiChecker.json'):
     if not url.startswith("https://") and not url.startswith("http://"):
         url = f"https://{instance_domain}.iriusrisk.com{url}"
 
@@ -94,6 +174,7 @@ def add_endpoint_to_queries(name, method, url, sample_structure, instance_domain
                     data = {"endpoints": [new_endpoint]}
                 file.seek(0)
                 json.dump(data, file, indent=4)
+                file.truncate()
         print(f"Successfully added the endpoint {name} to {filename}.")
     except (FileNotFoundError, json.JSONDecodeError) as e:
         print(f"Error handling {filename}: {e}")
@@ -117,15 +198,14 @@ def main():
         sys.exit(1)
 
     try:
-        with open(sample_output_file, 'r') as f:
-            sample_structure = json.load(f)
-    except json.JSONDecodeError as e:
+        parsed_structure = parse_sample_file(sample_output_file)
+    except ValueError as e:
         print(f"Error parsing sample output: {e}")
         sys.exit(1)
 
     instance_domain = read_credentials()
 
-    add_endpoint_to_queries(name, method, url, sample_structure, instance_domain)
+    add_endpoint_to_queries(name, method, url, parsed_structure, instance_domain)
 
 if __name__ == "__main__":
     main()
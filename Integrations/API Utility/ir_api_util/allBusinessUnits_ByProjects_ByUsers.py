@@ -1,9 +1,9 @@
 import os
 import sys
 import requests
-import pandas as pd
 import json
 from datetime import datetime, timedelta
+from api_client import get_session, ordered_map, read_max_workers
 
 def read_config(config_path='config.json'):
     try:
@@ -48,7 +48,7 @@ class BaseAPI:
             'api-token': self.api_token
         }
         try:
-            response = requests.get(url, headers=headers, params=params)
+            response = get_session().get(url, headers=headers, params=params)
             response.raise_for_status()
             return response.json()
         except requests.HTTPError as e:
@@ -63,8 +63,9 @@ class BaseAPI:
             return None
 
 class BusinessUnitReport(BaseAPI):
-    def __init__(self, api_token_path='~/ir/.ir_user_token', instance_domain_path='~/ir/ir_instance_domain'):
+    def __init__(self, api_token_path='~/ir/.ir_user_token', instance_domain_path='~/ir/ir_instance_domain', max_workers=None):
         super().__init__(api_token_path, instance_domain_path)
+        self.max_workers = max_workers or read_max_workers()
 
     def get_all_business_units(self):
         business_units_data = self.make_request('business-units?page=0&size=1000')
@@ -72,7 +73,58 @@ class BusinessUnitReport(BaseAPI):
             return []
         return business_units_data.get('_embedded', {}).get('items', [])
 
+    def get_all_projects(self):
+        first_page = self.make_request('projects?page=0&size=1000')
+        if first_page is None:
+            return []
+        projects = first_page.get('_embedded', {}).get('items', [])
+        total_pages = first_page.get('page', {}).get('totalPages', 1)
+
+        def fetch(page):
+            return self.make_request(f'projects?page={page}&size=1000')
+
+        for data in ordered_map(fetch, range(1, total_pages), self.max_workers):
+            if data is not None:
+                projects.extend(data.get('_embedded', {}).get('items', []))
+        return projects
+
+    def build_ownership_index(self, projects):
+        # One ownership request per project (fetched concurrently) instead of
+        # one per project per business unit. Returns
+        # {business unit id: [(project, owning business unit entry), ...]}.
+        print(f"Fetching business unit ownership for {len(projects)} projects...")
+
+        def fetch(project):
+            return self.make_request(f"projects/{project['id']}/ownership/business-units?page=0&size=1000")
+
+        index = {}
+        for project, data in zip(projects, ordered_map(fetch, projects, self.max_workers)):
+            if data is None:
+                continue
+            for bu in data.get('_embedded', {}).get('items', []):
+                index.setdefault(bu['id'], []).append((project, bu))
+        return index
+
+    def project_row(self, project, bu):
+        labels = project.get('labels', '')
+        if isinstance(labels, str):
+            tags = labels
+        else:
+            tags = ', '.join(tag['name'] for tag in labels) if labels else ''
+        return {
+            'Business Unit': bu.get('name', ''),
+            'Project(s)': project.get('name', ''),
+            'Reference ID': project.get('referenceId', ''),
+            'Description': project.get('description', ''),
+            'Tags': tags,
+            'Workflow State': project.get('workflowState', {}).get('name', '') if project.get('workflowState') else '',
+            'Owner(s)': ', '.join(owner['username'] for owner in bu.get('owners', [])),
+            'Created Date': project.get('modelUpdated', ''),
+            'Last Edited Date': project.get('modelUpdated', '')
+        }
+
     def generate_reports_for_all_business_units(self):
+        import pandas as pd
         business_units = self.get_all_business_units()
         if not business_units:
             print("No business units found.")
@@ -83,50 +135,23 @@ class BusinessUnitReport(BaseAPI):
         all_projects = []
         all_users = []
 
+        # Generate Project Report for every Business Unit from a single ownership index
+        ownership_index = self.build_ownership_index(self.get_all_projects())
         for bu in business_units:
-            business_unit_name = bu.get('name', '')
-            business_unit_id = bu.get('id', '')
+            for project, owner_bu in ownership_index.get(bu.get('id', ''), []):
+                all_projects.append(self.project_row(project, owner_bu))
 
-            # Generate Project Report for Business Unit
-            projects_data = self.make_request('projects?page=0&size=1000')
-            if projects_data is None:
-                continue
+        # Generate User Listing for every Business Unit
+        def fetch_users(bu):
+            return self.make_request(f"business-units/{bu.get('id', '')}/users?page=0&size=1000")
 
-            for project in projects_data.get('_embedded', {}).get('items', []):
-                project_id = project['id']
-                project_business_units_data = self.make_request(f'projects/{project_id}/ownership/business-units?page=0&size=1000')
-                if project_business_units_data is None:
-                    continue
-
-                business_units = project_business_units_data.get('_embedded', {}).get('items', [])
-                for bu in business_units:
-                    if bu['id'] == business_unit_id:
-                        labels = project.get('labels', '')
-                        if isinstance(labels, str):
-                            tags = labels
-                        else:
-                            tags = ', '.join(tag['name'] for tag in labels) if labels else ''
-                        all_projects.append({
-                            'Business Unit': bu.get('name', ''),
-                            'Project(s)': project.get('name', ''),
-                            'Reference ID': project.get('referenceId', ''),
-                            'Description': project.get('description', ''),
-                            'Tags': tags,
-                            'Workflow State': project.get('workflowState', {}).get('name', '') if project.get('workflowState') else '',
-                            'Owner(s)': ', '.join(owner['username'] for owner in bu.get('owners', [])),
-                            'Created Date': project.get('modelUpdated', ''),
-                            'Last Edited Date': project.get('modelUpdated', '')
-                        })
-
-            # Generate User Listing for Business Unit
-            endpoint = f'business-units/{business_unit_id}/users?page=0&size=1000'
-            data = self.make_request(endpoint)
+        for bu, data in zip(business_units, ordered_map(fetch_users, business_units, self.max_workers)):
             if data is None:
                 continue
 
             for item in data.get('_embedded', {}).get('items', []):
                 all_users.append({
-                    'Business Unit': business_unit_name,
+                    'Business Unit': bu.get('name', ''),
                     'Username': item.get('username', ''),
                     'Last Name': item.get('lastName', ''),
                     'First Name': item.get('firstName', '')
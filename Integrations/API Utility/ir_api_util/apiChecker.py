@@ -1,9 +1,14 @@
 import sys
+import time
+import random
+import argparse
 import requests
 import os
 import json
-from deepdiff import DeepDiff
+from datetime import datetime
 from auth import Auth
+from api_client import get_session, ordered_map, read_max_workers, percentile, TimeoutHTTPAdapter
+from rate_limiter import THROTTLE_STATUS_CODES
 
 # Function to load queries from the JSON file
 def load_queries(filename):
@@ -32,50 +37,87 @@ def read_config(config_path):
         os.makedirs(output_path, exist_ok=True)
         return output_path, 2000
 
-# Function to compare types
-def compare_types(expected, actual):
-    # If the expected value is None, allow any actual value
+MAX_THROTTLED_ATTEMPTS = 6
+
+
+# Session used for the timed requests. It is a plain requests.Session, so it
+# never reads from http_cache.db, and it has no rate limiter and no retries
+# of its own: the checker waits for the shared limiter before starting the
+# clock, so the latency figures measure the server rather than our pacing.
+def create_timing_session(pool_size):
+    session = requests.Session()
+    adapter = TimeoutHTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({'Accept-Encoding': 'gzip, deflate'})
+    return session
+
+# Checks for the type names used in expected_response
+TYPE_CHECKS = {
+    "string": lambda value: isinstance(value, str),
+    "int": lambda value: isinstance(value, int) and not isinstance(value, bool),  # bools are not ints here
+    "bool": lambda value: isinstance(value, bool),
+    "float": lambda value: isinstance(value, float),
+    "list": lambda value: isinstance(value, list),
+    "dict": lambda value: isinstance(value, dict),
+}
+PASS = (True, None)
+
+
+# Compile an expected structure into a validator: a closure tree built once
+# per endpoint, so type names and keys are not re-interpreted for every item.
+# validator(actual) returns (match, error) with the same rules as before:
+# None on either side always matches, dicts check every expected key, lists
+# check their first item against the first expected item.
+def compile_validator(expected):
     if expected is None:
-        return True, None  # Null means any value is valid
+        return lambda actual: PASS
 
-    # If the actual value is None, allow it for any expected type
-    if actual is None:
-        return True, None  # Null is acceptable for any expected type
+    def mismatch(actual):
+        return False, f"Type mismatch: expected {expected}, got {type(actual).__name__}"
 
-    if isinstance(expected, dict) and isinstance(actual, dict):
-        for key in expected:
-            if key not in actual:
-                return False, f"Missing key: {key}"
-            match, error = compare_types(expected[key], actual[key])
-            if not match:
-                return False, error
-    elif isinstance(expected, list) and isinstance(actual, list):
-        if len(expected) == 0 or len(actual) == 0:
-            return True, None  # Allow empty lists
-        return compare_types(expected[0], actual[0])
-    else:
-        # For string types
-        if expected == "string" and isinstance(actual, str):
-            return True, None
-        # For int types (ensuring bools are not mistaken for ints)
-        elif expected == "int" and isinstance(actual, int) and not isinstance(actual, bool):
-            return True, None
-        # For bool types
-        elif expected == "bool" and isinstance(actual, bool):
-            return True, None
-        # For float types
-        elif expected == "float" and isinstance(actual, float):
-            return True, None
-        # For list types
-        elif expected == "list" and isinstance(actual, list):
-            return True, None
-        # For dict types
-        elif expected == "dict" and isinstance(actual, dict):
-            return True, None
-        else:
-            return False, f"Type mismatch: expected {expected}, got {type(actual).__name__}"
-    
-    return True, None
+    if isinstance(expected, dict):
+        fields = [(key, compile_validator(value)) for key, value in expected.items()]
+
+        def validate_dict(actual):
+            if actual is None:
+                return PASS
+            if not isinstance(actual, dict):
+                return mismatch(actual)
+            for key, validate in fields:
+                if key not in actual:
+                    return False, f"Missing key: {key}"
+                match, error = validate(actual[key])
+                if not match:
+                    return False, error
+            return PASS
+        return validate_dict
+
+    if isinstance(expected, list):
+        validate_item = compile_validator(expected[0]) if expected else None
+
+        def validate_list(actual):
+            if actual is None:
+                return PASS
+            if not isinstance(actual, list):
+                return mismatch(actual)
+            if validate_item is None or not actual:
+                return PASS  # Allow empty lists
+            return validate_item(actual[0])
+        return validate_list
+
+    check = TYPE_CHECKS.get(expected) if isinstance(expected, str) else None
+
+    def validate_value(actual):
+        if actual is None or (check is not None and check(actual)):
+            return PASS
+        return mismatch(actual)
+    return validate_value
+
+
+# Function to compare types
+def compare_types(expected, actual):
+    return compile_validator(expected)(actual)
 
 
 # Class to handle API checking
@@ -89,6 +131,9 @@ class APIChecker:
         self.api_token, self.instance_domain = self.read_credentials()
         script_dir = os.path.dirname(os.path.realpath(__file__))
         self.output_path, self.page_size = read_config(os.path.join(script_dir, 'config.json'))
+        self.max_workers = read_max_workers(os.path.join(script_dir, 'config.json'))
+        self.session = create_timing_session(self.max_workers)
+        self.limiter = get_session().limiter
 
     def read_credentials(self):
         try:
@@ -101,7 +146,39 @@ class APIChecker:
             print(f"Error: {e}. Make sure the paths are correct.")
             sys.exit(1)  # Exit if credentials cannot be read
 
-    def test_endpoint(self, endpoint):
+    def timed_request(self, method, url, headers):
+        # Returns (response, latency_ms). Throttled attempts are retried after
+        # the limiter's Retry-After pause; only the final attempt is timed.
+        for _ in range(MAX_THROTTLED_ATTEMPTS):
+            self.limiter.acquire()
+            start = time.perf_counter()
+            response = self.session.request(method, url, headers=headers)
+            latency_ms = round((time.perf_counter() - start) * 1000, 2)
+            self.limiter.record(response.status_code, response.headers.get('Retry-After'))
+            if response.status_code not in THROTTLE_STATUS_CODES:
+                break
+        return response, latency_ms
+
+    def validate_items(self, validator, items, sample=None, max_failures=1):
+        # Validates the items of a list response. With sample set, only that
+        # many randomly chosen items are checked; validation stops after
+        # max_failures mismatches. Returns [(index, error), ...].
+        indices = range(len(items))
+        if sample is not None and sample < len(items):
+            indices = sorted(random.sample(indices, sample))
+        failures = []
+        for i in indices:
+            match, error = validator(items[i])
+            if not match:
+                failures.append((i, error))
+                if len(failures) >= max_failures:
+                    break
+        return failures
+
+    def test_endpoint(self, endpoint, repetitions=1, sample=None, max_failures=1):
+        # Runs in a worker thread, so output is collected in result['log'] and
+        # printed by run_tests in endpoint order. The endpoint is requested
+        # `repetitions` times for latency; the first response is validated.
         method = endpoint.get("method", "GET").upper()
         relative_url = endpoint["url"]
 
@@ -111,64 +188,134 @@ class APIChecker:
         else:
             url = relative_url
 
-        headers = endpoint.get("headers", {})
+        headers = dict(endpoint.get("headers", {}))
         headers['api-token'] = self.api_token  # Use the stored API token
         expected_status = endpoint["expected_status"]
         expected_response = endpoint["expected_response"]
 
-        try:
-            response = requests.request(method, url, headers=headers)
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching {url}: {e}")
-            return False
+        log = []
+        result = {
+            'name': endpoint['name'],
+            'method': method,
+            'url': url,
+            'expected_status': expected_status,
+            'status': None,
+            'passed': False,
+            'error': None,
+            'latency_ms': [],
+            'log': log
+        }
+
+        response = None
+        for _ in range(max(1, repetitions)):
+            try:
+                current, latency_ms = self.timed_request(method, url, headers)
+            except requests.exceptions.RequestException as e:
+                log.append(f"Error fetching {url}: {e}")
+                result['error'] = str(e)
+                return result
+            result['latency_ms'].append(latency_ms)
+            if current.status_code != expected_status and result['error'] is None:
+                result['error'] = f"Status Code Mismatch! Expected {expected_status}, got {current.status_code}"
+            if response is None:
+                response = current
 
         status_code = response.status_code
+        result['status'] = status_code
         try:
             response_json = response.json()
         except json.JSONDecodeError:
-            print(f"Invalid JSON response from {url}")
-            return False
+            log.append(f"Invalid JSON response from {url}")
+            result['error'] = "Invalid JSON response"
+            return result
 
-        print(f"Testing {endpoint['name']} - {method} {url}")
-        print(f"Expected Status: {expected_status}, Actual Status: {status_code}")
+        log.append(f"Testing {endpoint['name']} - {method} {url}")
+        log.append(f"Expected Status: {expected_status}, Actual Status: {status_code}")
 
-        if status_code != expected_status:
-            print(f"Status Code Mismatch! Expected {expected_status}, got {status_code}")
-            return False
+        if result['error'] is not None:
+            log.append(result['error'])
+            return result
 
         # Compare response JSON structure with expected structure
         if isinstance(response_json, list) and isinstance(expected_response, list):
-            for i, item in enumerate(response_json):
-                match, error = compare_types(expected_response[0], item)
-                if not match:
-                    print(f"Response Mismatch at item {i}! {error}")
-                    print(f"Expected: {expected_response[0]}\nGot: {item}")
-                    return False
+            validator = compile_validator(expected_response[0] if expected_response else None)
+            failures = self.validate_items(validator, response_json, sample, max_failures)
+            if failures:
+                first, error = failures[0]
+                result['error'] = f"Response Mismatch at item {first}! {error}"
+                result['mismatches'] = [{'item': i, 'error': e} for i, e in failures]
+                for i, e in failures:
+                    log.append(f"Response Mismatch at item {i}! {e}")
+                log.append(f"Expected: {expected_response[0]}\nGot: {response_json[first]}")
+                return result
         else:
-            match, error = compare_types(expected_response, response_json)
+            match, error = compile_validator(expected_response)(response_json)
             if not match:
-                print(f"Response Mismatch Found! {error}")
-                print(f"Expected: {expected_response}\nGot: {response_json}")
-                return False
-
-        print("Test Passed!")
-        return True
-
-    def run_tests(self, queries):
-        print(f"Found {len(queries['endpoints'])} endpoints to test.")
-        for i, endpoint in enumerate(queries['endpoints']):
-            print(f"Running test {i + 1} of {len(queries['endpoints'])}...")
-            success = self.test_endpoint(endpoint)
-            if not success:
-                print(f"Test Failed for {endpoint['name']}!\n")
+                result['error'] = f"Response Mismatch Found! {error}"
+                log.append(result['error'])
+                log.append(f"Expected: {expected_response}\nGot: {response_json}")
+                return result
+
+        log.append("Test Passed!")
+        result['passed'] = True
+        return result
+
+    def run_tests(self, queries, repetitions=1, sample=None, max_failures=1):
+        # Endpoints are checked concurrently (up to max_workers from
+        # config.json); results are reported in file order.
+        endpoints = queries['endpoints']
+        print(f"Found {len(endpoints)} endpoints to test.")
+
+        def check(endpoint):
+            return self.test_endpoint(endpoint, repetitions, sample, max_failures)
+
+        results = []
+        for i, result in enumerate(ordered_map(check, endpoints, self.max_workers)):
+            print(f"Running test {i + 1} of {len(endpoints)}...")
+            for line in result.pop('log'):
+                print(line)
+            latencies = result['latency_ms']
+            result['p50_ms'] = percentile(latencies, 50)
+            result['p95_ms'] = percentile(latencies, 95)
+            result['max_ms'] = max(latencies) if latencies else None
+            if latencies:
+                print(f"Latency over {len(latencies)} request(s): p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, max {result['max_ms']} ms")
+            if not result['passed']:
+                print(f"Test Failed for {result['name']}!\n")
             else:
-                print(f"Test Succeeded for {endpoint['name']}!\n")
+                print(f"Test Succeeded for {result['name']}!\n")
+            results.append(result)
+        return results
+
+    def write_report(self, results, repetitions):
+        report = {
+            'instance': self.instance_domain,
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'repetitions': repetitions,
+            'passed': sum(1 for r in results if r['passed']),
+            'failed': sum(1 for r in results if not r['passed']),
+            'endpoints': results
+        }
+        report_file = os.path.join(self.output_path, f"apiChecker_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        with open(report_file, 'w') as f:
+            json.dump(report, f, indent=4)
+        print(f"{report['passed']} passed, {report['failed']} failed. Report saved to {report_file}")
+        return report_file
 
 def main():
+    parser = argparse.ArgumentParser(description="Check IriusRisk API endpoints against apiChecker.json.")
+    parser.add_argument('--repeat', type=int, default=1, help="requests per endpoint used for the latency figures (default: 1)")
+    parser.add_argument('--sample', type=int, help="validate only N randomly chosen items of list responses")
+    parser.add_argument('--max-failures', type=int, default=1, help="mismatches to collect per endpoint before stopping (default: 1)")
+    args = parser.parse_args()
+
     script_dir = os.path.dirname(os.path.realpath(__file__))
     api_checker = APIChecker()
     queries = load_queries(os.path.join(script_dir, 'apiChecker.json'))
-    api_checker.run_tests(queries)
+    if queries is None:
+        return
+    results = api_checker.run_tests(queries, args.repeat, args.sample, max(1, args.max_failures))
+    api_checker.write_report(results, args.repeat)
 
 # Proper entry point check
 if __name__ == "__main__":
@@ -0,0 +1,202 @@
+import os
+import json
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from http_cache import CachingSession, HttpCache, DEFAULT_DB_NAME, DEFAULT_MAX_BYTES, DEFAULT_TTL
+from rate_limiter import AdaptiveRateLimiter, DEFAULT_MAX_RPS, THROTTLE_STATUS_CODES, parse_retry_after
+
+# Shared HTTP client for the ir_api_util scripts.
+# One keep-alive connection pool per process, gzip on the wire, and retries
+# with jittered exponential backoff that honour Retry-After on 429/503.
+# Every request, retries included, is paced by one adaptive rate limiter
+# (max_rps in config.json) that slows down while the server throttles.
+# GETs on library endpoints go through the local HTTP cache (http_cache.py)
+# unless it is switched off in config.json or with --no-cache.
+
+DEFAULT_TIMEOUT = 60
+POOL_SIZE = 32
+RETRY_TOTAL = 5
+RETRY_BACKOFF_FACTOR = 1
+RETRY_STATUS_CODES = [429, 500, 502, 503, 504]
+DEFAULT_MAX_WORKERS = 8
+
+_session = None
+_session_lock = threading.Lock()
+_http_cache_enabled = True
+
+
+class JitterRetry(Retry):
+    """Retry policy that adds random jitter on top of urllib3's exponential backoff."""
+
+    def __init__(self, *args, jitter=1.0, limiter=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.jitter = jitter
+        self.limiter = limiter
+
+    def new(self, **kwargs):
+        retry = super().new(**kwargs)
+        retry.jitter = self.jitter
+        retry.limiter = self.limiter
+        return retry
+
+    def increment(self, method=None, url=None, response=None, *args, **kwargs):
+        # Attempts that urllib3 retries internally never reach the adapter, so
+        # they are reported to the limiter here. When retries are exhausted
+        # super() raises and the final response is left to the adapter, so
+        # every response is recorded exactly once.
+        retry = super().increment(method, url, response, *args, **kwargs)
+        if self.limiter is not None and response is not None:
+            self.limiter.record(response.status, response.headers.get('Retry-After'))
+        return retry
+
+    def sleep(self, response=None):
+        # A throttled response with Retry-After has already paused the
+        # limiter for that long, so waiting for the next token covers it.
+        # Everything else keeps the jittered exponential backoff as a
+        # minimum and then takes a token as well.
+        if not (self.limiter is not None and response is not None
+                and response.status in THROTTLE_STATUS_CODES
+                and parse_retry_after(response.headers.get('Retry-After')) is not None):
+            super().sleep(response)
+        if self.limiter is not None:
+            self.limiter.acquire()
+
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        return backoff + random.uniform(0, self.jitter)
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout and paces requests through a rate limiter."""
+
+    def __init__(self, *args, timeout=DEFAULT_TIMEOUT, limiter=None, **kwargs):
+        self.timeout = timeout
+        self.limiter = limiter
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        if self.limiter is None:
+            return super().send(request, **kwargs)
+        self.limiter.acquire()
+        response = super().send(request, **kwargs)
+        self.limiter.record(response.status_code, response.headers.get('Retry-After'))
+        return response
+
+
+def create_session(pool_size=POOL_SIZE, timeout=DEFAULT_TIMEOUT, max_rps=None):
+    session = CachingSession()
+    limiter = AdaptiveRateLimiter(max_rps or read_max_rps())
+    retry = JitterRetry(
+        limiter=limiter,
+        total=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=["HEAD", "GET", "OPTIONS"],
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = TimeoutHTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry,
+        timeout=timeout,
+        limiter=limiter
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({'Accept-Encoding': 'gzip, deflate'})
+    session.limiter = limiter
+    return session
+
+
+def get_session():
+    # Lazily build the process-wide session so every script (and every
+    # thread inside a script) reuses the same warm connection pool.
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+                if _http_cache_enabled:
+                    _session.cache = create_http_cache()
+    return _session
+
+
+def set_http_cache_enabled(enabled):
+    # Called for --no-cache. Scripts run in-process from the menu share one
+    # session, so the cache is detached from (or re-attached to) it as well.
+    global _http_cache_enabled
+    _http_cache_enabled = enabled
+    if _session is not None:
+        if not enabled:
+            _session.cache = None
+        elif _session.cache is None:
+            _session.cache = create_http_cache()
+
+
+def create_http_cache(config_path='config.json'):
+    # "http_cache": false in config.json turns the cache off; the size cap
+    # (http_cache_max_mb) and fallback TTL (http_cache_ttl) are optional.
+    try:
+        with open(config_path, 'r') as config_file:
+            config = json.load(config_file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        config = {}
+    if not config.get('http_cache', True):
+        return None
+    output_path = os.path.expanduser(config.get('output_path', '~/'))
+    try:
+        max_bytes = int(float(config['http_cache_max_mb']) * 1024 * 1024) if 'http_cache_max_mb' in config else DEFAULT_MAX_BYTES
+        default_ttl = int(config.get('http_cache_ttl', DEFAULT_TTL))
+    except (TypeError, ValueError):
+        max_bytes, default_ttl = DEFAULT_MAX_BYTES, DEFAULT_TTL
+    return HttpCache(os.path.join(output_path, DEFAULT_DB_NAME), max_bytes, default_ttl)
+
+
+def read_max_workers(config_path='config.json'):
+    try:
+        with open(config_path, 'r') as config_file:
+            config = json.load(config_file)
+            return max(1, int(config.get('max_workers', DEFAULT_MAX_WORKERS)))
+    except (FileNotFoundError, json.JSONDecodeError, TypeError, ValueError):
+        return DEFAULT_MAX_WORKERS
+
+
+def read_max_rps(config_path='config.json'):
+    try:
+        with open(config_path, 'r') as config_file:
+            config = json.load(config_file)
+            return max(0.2, float(config.get('max_rps', DEFAULT_MAX_RPS)))
+    except (FileNotFoundError, json.JSONDecodeError, TypeError, ValueError):
+        return DEFAULT_MAX_RPS
+
+
+def ordered_map(func, items, max_workers=DEFAULT_MAX_WORKERS):
+    # Run func over items on a bounded thread pool and yield the results in
+    # input order. At most 2 * max_workers calls are in flight at once, so a
+    # slow consumer never lets completed results pile up in memory.
+    window = max(1, max_workers) * 2
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def percentile(values, pct):
+    # Nearest-rank percentile; None for an empty list.
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
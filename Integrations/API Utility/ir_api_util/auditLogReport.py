@@ -1,11 +1,12 @@
 import os
 import sys
+import csv
+import argparse
 import requests
 import json
-import pandas as pd
 from datetime import datetime, timedelta
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
+from api_client import get_session, ordered_map, read_max_workers
+from audit_log_store import AuditLogStore, DEFAULT_DB_NAME
 
 def read_config(config_path='config.json'):
     try:
@@ -20,6 +21,144 @@ def read_config(config_path='config.json'):
         os.makedirs(output_path, exist_ok=True)
         return output_path
 
+PROJECT_LOG_TYPES = [
+    "PROJECT_SETTINGS_SAVED", "PROJECTS_IMPORTED", "PROJECT_DIAGRAM_UPDATED", "PROJECT_UPDATED",
+    "ISSUE_CREATED", "CONTROL_CREATED", "CONTROL_UPDATED",
+    "CONTROL_APPLIED", "THREAT_CREATED", "THREAT_UPDATED", "THREAT_CONTROL_MITIGATION_UPDATED_MANUALLY",
+    "THREAT_CONTROL_MITIGATION_UPDATED_AUTOMATICALLY"
+]
+USER_LOG_TYPES = ["LOGIN_SUCCESS", "LOGIN_NO_USER", "LOGIN_WRONG_PASSWORD", "LOGIN_ACCOUNT_LOCKED", "LOGIN_ACCOUNT_DISABLED", "USER_LOGGEDOUT", "USER_LOGGED_OUT_BY_ADMIN", "USER_ENABLED", "USER_DISABLED"]
+USER_LOG_PERIODS = [7, 14, 30, 90, 180]
+SYNC_WINDOW_DAYS = 180
+
+class NdjsonLogWriter:
+    extension = 'ndjson'
+
+    def __init__(self, file_path):
+        self.file = open(file_path, 'w', encoding='utf-8')
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.file.write(json.dumps(row, ensure_ascii=False))
+            self.file.write('\n')
+
+    def close(self):
+        self.file.close()
+
+class StagedLogWriter:
+    # Event types share one output file but not one set of keys, so the rows
+    # are first staged as NDJSON next to the output while the union of their
+    # columns is collected; close() writes the real file in a second pass.
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.staging_path = f"{file_path}.part.ndjson"
+        self.staging = open(self.staging_path, 'w', encoding='utf-8')
+        self.columns = {}
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.columns.update(dict.fromkeys(row))
+            self.staging.write(json.dumps(row, ensure_ascii=False))
+            self.staging.write('\n')
+
+    def staged_rows(self):
+        with open(self.staging_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+
+    def close(self):
+        self.staging.close()
+        try:
+            self.finish()
+        finally:
+            os.remove(self.staging_path)
+
+class CsvLogWriter(StagedLogWriter):
+    extension = 'csv'
+
+    def finish(self):
+        if not self.columns:
+            return
+        # Nested values are written as JSON; keys an event lacks are left empty.
+        with open(self.file_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(self.columns))
+            writer.writeheader()
+            for row in self.staged_rows():
+                writer.writerow({
+                    key: json.dumps(value, ensure_ascii=False) if isinstance(value, (dict, list)) else value
+                    for key, value in row.items()
+                })
+
+class ParquetLogWriter(StagedLogWriter):
+    extension = 'parquet'
+    batch_rows = 2000
+
+    def __init__(self, file_path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.pa = pa
+        self.pq = pq
+        self.types = {}
+        super().__init__(file_path)
+
+    def write_rows(self, rows):
+        super().write_rows(rows)
+        for column in dict.fromkeys(key for row in rows for key in row):
+            self.types[column] = self.merge_types(self.types.get(column), self.infer_type([row.get(column) for row in rows]))
+
+    def infer_type(self, values):
+        try:
+            return self.pa.array(values).type
+        except (self.pa.ArrowInvalid, self.pa.ArrowTypeError):
+            return self.pa.string()
+
+    def merge_types(self, old, new):
+        # A column keeps one type across pages: null (all-missing) pages adopt
+        # the other type, ints widen to floats, and any other conflict falls
+        # back to strings (JSON for nested values).
+        pa = self.pa
+        if old is None or pa.types.is_null(old):
+            return new
+        if pa.types.is_null(new) or old == new:
+            return old
+        if (pa.types.is_integer(old) or pa.types.is_floating(old)) and (pa.types.is_integer(new) or pa.types.is_floating(new)):
+            return pa.float64()
+        return pa.string()
+
+    def finish(self):
+        if not self.columns:
+            return
+        pa = self.pa
+        schema = pa.schema([
+            (column, pa.string() if pa.types.is_null(self.types[column]) else self.types[column])
+            for column in self.columns
+        ])
+        string_columns = {field.name for field in schema if pa.types.is_string(field.type)}
+
+        def conform(row):
+            for column in string_columns:
+                value = row.get(column)
+                if value is not None and not isinstance(value, str):
+                    row[column] = json.dumps(value, ensure_ascii=False) if isinstance(value, (dict, list)) else str(value)
+            return row
+
+        with self.pq.ParquetWriter(self.file_path, schema) as writer:
+            batch = []
+            for row in self.staged_rows():
+                batch.append(conform(row))
+                if len(batch) >= self.batch_rows:
+                    writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                    batch = []
+            if batch:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+
+STREAM_FORMATS = {
+    'csv': CsvLogWriter,
+    'ndjson': NdjsonLogWriter,
+    'parquet': ParquetLogWriter
+}
+
 class BaseAPI:
     def __init__(self, api_token_path='~/ir/.ir_user_token', instance_domain_path='~/ir/ir_instance_domain'):
         self.api_token_path = os.path.expanduser(api_token_path)
@@ -39,17 +178,7 @@ class BaseAPI:
             sys.exit(1)
 
     def create_session(self):
-        session = requests.Session()
-        retry = Retry(
-            total=5,
-            backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["HEAD", "GET", "OPTIONS"]
-        )
-        adapter = HTTPAdapter(max_retries=retry)
-        session.mount("https://", adapter)
-        session.mount("http://", adapter)
-        return session
+        return get_session()
 
     def make_request(self, endpoint, params={}):
         url = f'https://{self.instance_domain}.iriusrisk.com/api/v2/{endpoint}'
@@ -69,73 +198,113 @@ class BaseAPI:
             return None
 
 class AuditLogReport(BaseAPI):
-    def __init__(self, api_token_path='~/ir/.ir_user_token', instance_domain_path='~/ir/ir_instance_domain'):
+    def __init__(self, api_token_path='~/ir/.ir_user_token', instance_domain_path='~/ir/ir_instance_domain', max_workers=None, store=None):
         super().__init__(api_token_path, instance_domain_path)
         self.output_path = read_config()
+        self.page_size = 2000  # 2000 is the largest page size
+        self.max_workers = max_workers or read_max_workers()
+        # Optional AuditLogStore; when set, only events newer than the stored
+        # watermark are downloaded and reports are answered from the store.
+        self.store = store
+        self.synced_types = set()
 
-    def fetch_total_pages(self, log_type, days):
+    def build_filter(self, log_type, days=None, since=None):
         end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
-        start_date_str = start_date.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+        if since is None:
+            start_date = end_date - timedelta(days=days)
+            since = start_date.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
         end_date_str = end_date.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+        return f"('timestamp'>='{since}':AND:'timestamp'<='{end_date_str}'):AND:'eventType'='{log_type}'"
 
+    def fetch_page(self, filter_value, page):
         params = {
-            'filter': f"('timestamp'>='{start_date_str}':AND:'timestamp'<='{end_date_str}'):AND:'eventType'='{log_type}'",
-            'page': 0,
-            'size': 2000  #2000 is the largest  page size
+            'filter': filter_value,
+            'page': page,
+            'size': self.page_size
         }
+        return self.make_request('audit-logs', params=params)
 
-        response = self.make_request('audit-logs', params=params)
+    def fetch_total_pages(self, log_type, days):
+        response = self.fetch_page(self.build_filter(log_type, days), 0)
         if response and 'page' in response:
             return response['page']['totalPages']
         return 0
 
-    def fetch_audit_logs(self, log_type, days):
-        total_pages = self.fetch_total_pages(log_type, days)
-        print(f"Total pages for log type '{log_type}' from the last {days} days: {total_pages}")
+    def iter_audit_log_pages(self, log_type, days=None, since=None, strict=False):
+        # The first page tells us totalPages; the remaining pages are fetched
+        # concurrently but yielded in page order. The filter is built once so
+        # every page sees the same time window. In strict mode a failed page
+        # raises instead of being skipped, so a sync never records a gap.
+        window = f"since {since}" if since else f"from the last {days} days"
+        filter_value = self.build_filter(log_type, days, since)
+        first_page = self.fetch_page(filter_value, 0)
+        if not first_page or 'page' not in first_page:
+            if strict:
+                raise RuntimeError(f"Failed to fetch audit logs for '{log_type}' {window}")
+            print(f"Total pages for log type '{log_type}' {window}: 0")
+            return
+        total_pages = first_page['page']['totalPages']
+        print(f"Total pages for log type '{log_type}' {window}: {total_pages}")
+        if total_pages == 0:
+            return
 
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
-        start_date_str = start_date.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
-        end_date_str = end_date.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+        print(f"Fetching page 1 of {total_pages} for log type '{log_type}'...")
+        yield first_page.get('_embedded', {}).get('items', [])
 
-        all_logs = []
-        for page in range(total_pages):
+        def fetch(page):
             print(f"Fetching page {page + 1} of {total_pages} for log type '{log_type}'...")
-            params = {
-                'filter': f"('timestamp'>='{start_date_str}':AND:'timestamp'<='{end_date_str}'):AND:'eventType'='{log_type}'",
-                'page': page,
-                'size': 2000  #2000 is the largest  page size
-            }
-            response = self.make_request('audit-logs', params=params)
+            return self.fetch_page(filter_value, page)
+
+        for page, response in enumerate(ordered_map(fetch, range(1, total_pages), self.max_workers), start=2):
             if response and '_embedded' in response:
-                logs = response['_embedded']['items']
-                all_logs.extend(logs)
+                yield response['_embedded']['items']
+            elif strict:
+                raise RuntimeError(f"Failed to fetch page {page} of {total_pages} for '{log_type}'")
+
+    def fetch_pages_since(self, log_type, since):
+        return self.iter_audit_log_pages(log_type, since=since, strict=True)
+
+    def iter_log_pages(self, log_type, days):
+        if self.store is None:
+            yield from self.iter_audit_log_pages(log_type, days)
+            return
+        # Sync each event type once per run over the widest window any report
+        # needs, then serve every period from the local store.
+        if log_type not in self.synced_types:
+            self.store.sync(log_type, SYNC_WINDOW_DAYS, self.fetch_pages_since)
+            self.synced_types.add(log_type)
+        page = []
+        for event in self.store.iter_events(log_type, days):
+            page.append(event)
+            if len(page) >= self.page_size:
+                yield page
+                page = []
+        if page:
+            yield page
+
+    def fetch_audit_logs(self, log_type, days):
+        all_logs = []
+        for logs in self.iter_log_pages(log_type, days):
+            all_logs.extend(logs)
 
         print(f"Fetched {len(all_logs)} logs for type '{log_type}' from the last {days} days.")
         return all_logs
 
     def generate_reports(self):
+        import pandas as pd
         project_logs = []
-        user_logs = {7: [], 14: [], 30: [], 90: [], 180: []}
-        project_log_types = [
-            "PROJECT_SETTINGS_SAVED", "PROJECTS_IMPORTED", "PROJECT_DIAGRAM_UPDATED", "PROJECT_UPDATED",
-            "ISSUE_CREATED", "CONTROL_CREATED", "CONTROL_UPDATED",
-            "CONTROL_APPLIED", "THREAT_CREATED", "THREAT_UPDATED", "THREAT_CONTROL_MITIGATION_UPDATED_MANUALLY",
-            "THREAT_CONTROL_MITIGATION_UPDATED_AUTOMATICALLY"
-        ]
-        user_log_types = ["LOGIN_SUCCESS", "LOGIN_NO_USER", "LOGIN_WRONG_PASSWORD", "LOGIN_ACCOUNT_LOCKED", "LOGIN_ACCOUNT_DISABLED", "USER_LOGGEDOUT", "USER_LOGGED_OUT_BY_ADMIN", "USER_ENABLED", "USER_DISABLED"]
+        user_logs = {days: [] for days in USER_LOG_PERIODS}
 
         print("Fetching project logs...")
         # Fetch project logs
-        for log_type in project_log_types:
+        for log_type in PROJECT_LOG_TYPES:
             logs = self.fetch_audit_logs(log_type, 180)  # Fetch logs for the last 6 months
             project_logs.extend(logs)
 
         print("Fetching user logs...")
         # Fetch user logs for different periods
         for days in user_logs.keys():
-            for log_type in user_log_types:
+            for log_type in USER_LOG_TYPES:
                 logs = self.fetch_audit_logs(log_type, days)
                 user_logs[days].extend(logs)
 
@@ -154,10 +323,51 @@ class AuditLogReport(BaseAPI):
 
         print(f"Reports saved to {os.path.join(self.output_path, 'audit_log_report.xlsx')}")
 
+    def stream_log_types(self, log_types, days, file_name, fmt):
+        # Each page goes straight to disk as it arrives, so memory stays flat
+        # regardless of how many days or pages are requested.
+        file_path = os.path.join(self.output_path, f"{file_name}.{STREAM_FORMATS[fmt].extension}")
+        writer = STREAM_FORMATS[fmt](file_path)
+        total = 0
+        try:
+            for log_type in log_types:
+                for logs in self.iter_log_pages(log_type, days):
+                    writer.write_rows(logs)
+                    total += len(logs)
+        finally:
+            writer.close()
+        print(f"Streamed {total} logs to {file_path}")
+        return file_path
+
+    def stream_reports(self, fmt):
+        print("Streaming project logs...")
+        self.stream_log_types(PROJECT_LOG_TYPES, 180, 'audit_log_project_activity', fmt)
+
+        print("Streaming user logs...")
+        for days in USER_LOG_PERIODS:
+            self.stream_log_types(USER_LOG_TYPES, days, f'audit_log_user_activity_{days}_days', fmt)
+
 def main():
+    parser = argparse.ArgumentParser(description="Generate the IriusRisk audit log report.")
+    parser.add_argument('--stream', choices=list(STREAM_FORMATS),
+                        help="Write each page to disk as it arrives instead of building an Excel report")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Sync into the local audit log store and download only events newer than the last run")
+    args = parser.parse_args()
+
     print("Starting Audit Log Report generation...")
-    report = AuditLogReport()
-    report.generate_reports()
+    store = None
+    if args.incremental:
+        store = AuditLogStore(os.path.join(read_config(), DEFAULT_DB_NAME))
+    report = AuditLogReport(store=store)
+    try:
+        if args.stream:
+            report.stream_reports(args.stream)
+        else:
+            report.generate_reports()
+    finally:
+        if store is not None:
+            store.close()
     print("Audit Log Report generation completed.")
     print("")
 
@@ -0,0 +1,140 @@
+import os
+import json
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+# Local append-only store of IriusRisk audit-log events.
+# Events are kept in SQLite together with a per-eventType watermark (the newest
+# synced timestamp and the oldest point the store covers), so scheduled reports
+# only download events newer than the last run.
+
+DEFAULT_DB_NAME = 'audit_logs.db'
+
+
+def format_timestamp(value):
+    return value.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+
+def window_start(days):
+    return format_timestamp(datetime.now() - timedelta(days=days))
+
+
+def timestamp_to_epoch(value):
+    # Audit log timestamps are ISO-8601 strings; epoch milliseconds are accepted too.
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return value / 1000.0
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def event_key(event):
+    if event.get('id') is not None:
+        return str(event['id'])
+    return hashlib.sha1(json.dumps(event, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class AuditLogStore:
+    def __init__(self, db_path):
+        self.db_path = os.path.expanduser(db_path)
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS audit_logs (
+                event_key TEXT PRIMARY KEY,
+                event_type TEXT NOT NULL,
+                timestamp TEXT,
+                ts_epoch REAL,
+                username TEXT,
+                payload TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_audit_logs_type_ts ON audit_logs (event_type, ts_epoch);
+            CREATE TABLE IF NOT EXISTS sync_state (
+                event_type TEXT PRIMARY KEY,
+                synced_from TEXT NOT NULL,
+                last_timestamp TEXT
+            );
+        ''')
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def get_state(self, event_type):
+        row = self.conn.execute(
+            'SELECT synced_from, last_timestamp FROM sync_state WHERE event_type = ?', (event_type,)
+        ).fetchone()
+        return (row[0], row[1]) if row else (None, None)
+
+    def append(self, event_type, events):
+        # Returns (rows written, (epoch, timestamp) of the newest event or None).
+        rows = []
+        newest = None
+        for event in events:
+            timestamp = event.get('timestamp')
+            epoch = timestamp_to_epoch(timestamp)
+            if epoch is not None and (newest is None or epoch > newest[0]):
+                newest = (epoch, timestamp)
+            rows.append((event_key(event), event_type, timestamp, epoch, event.get('username'),
+                         json.dumps(event, ensure_ascii=False)))
+        with self.lock:
+            self.conn.executemany('INSERT OR IGNORE INTO audit_logs VALUES (?, ?, ?, ?, ?, ?)', rows)
+            self.conn.commit()
+        return len(rows), newest
+
+    def sync(self, event_type, days, fetch_pages):
+        # fetch_pages(event_type, since) must yield lists of audit-log items with
+        # 'timestamp' >= since. Only the part of the window the store does not
+        # already hold is requested; duplicates at the watermark are ignored.
+        # The watermark only moves once every page has been stored, so an
+        # interrupted run is simply repeated from the previous watermark.
+        start = window_start(days)
+        synced_from, last_timestamp = self.get_state(event_type)
+        if synced_from is None or timestamp_to_epoch(start) < timestamp_to_epoch(synced_from):
+            synced_from = start
+            since = start
+        else:
+            since = last_timestamp or synced_from
+
+        fetched = 0
+        newest = (timestamp_to_epoch(last_timestamp), last_timestamp) if last_timestamp else None
+        for events in fetch_pages(event_type, since):
+            count, page_newest = self.append(event_type, events)
+            fetched += count
+            if page_newest is not None and (newest is None or page_newest[0] > newest[0]):
+                newest = page_newest
+
+        with self.lock:
+            self.conn.execute(
+                'INSERT INTO sync_state (event_type, synced_from, last_timestamp) VALUES (?, ?, ?) '
+                'ON CONFLICT(event_type) DO UPDATE SET synced_from = excluded.synced_from, '
+                'last_timestamp = excluded.last_timestamp',
+                (event_type, synced_from, newest[1] if newest else None))
+            self.conn.commit()
+        print(f"Synced {fetched} '{event_type}' events newer than {since}.")
+        return fetched
+
+    def iter_events(self, event_type, days):
+        cutoff = timestamp_to_epoch(window_start(days))
+        cursor = self.conn.execute(
+            'SELECT payload FROM audit_logs WHERE event_type = ? AND ts_epoch >= ? ORDER BY ts_epoch',
+            (event_type, cutoff))
+        for (payload,) in cursor:
+            yield json.loads(payload)
+
+    def usernames(self, event_type, days):
+        cutoff = timestamp_to_epoch(window_start(days))
+        cursor = self.conn.execute(
+            'SELECT DISTINCT username FROM audit_logs WHERE event_type = ? AND ts_epoch >= ? AND username IS NOT NULL',
+            (event_type, cutoff))
+        return {row[0] for row in cursor}
@@ -0,0 +1,169 @@
+import os
+import sys
+import csv
+import argparse
+from api_client import ordered_map
+from fetch_components import read_config
+from library_crawler import create_crawler, threat_ids_for, LibraryFetchError
+from drools_policy import render_drl, write_drl, render_rule, component_condition, category_condition, policy_filename, parse_stride
+
+# Non-interactive Trust Zone policy generation.
+# Reads a matrix of policies from CSV or YAML, one entry per policy:
+#   policy_name, trust_zone, component | category, stride, reason
+# trust_zone, component and category accept a name, id or referenceId; stride
+# accepts letters ("STI") or category names. The library is crawled once for
+# every component in the matrix and all rules are rendered from that index.
+
+
+def load_matrix(path):
+    if path.lower().endswith(('.yaml', '.yml')):
+        try:
+            import yaml
+        except ImportError:
+            sys.exit("❌ PyYAML is required for YAML matrices (pip3 install pyyaml), or use a CSV file.")
+        with open(path, 'r') as f:
+            data = yaml.safe_load(f) or []
+        rows = data.get('policies', []) if isinstance(data, dict) else data
+    else:
+        with open(path, 'r', newline='') as f:
+            rows = list(csv.DictReader(f))
+    return [{key.strip().lower(): value for key, value in row.items() if key} for row in rows]
+
+
+def lookup_table(items, *keys):
+    table = {}
+    for item in items:
+        for key in keys:
+            if item.get(key):
+                table[str(item[key]).lower()] = item
+    return table
+
+
+def resolve_policies(rows, crawler):
+    # Turns matrix rows into policies with their trust zone, definition
+    # condition and component list. Every problem is reported before any
+    # crawling starts.
+    trust_zones = lookup_table(crawler.get_trust_zones(), 'id', 'name', 'referenceId')
+    components = lookup_table(crawler.get_components(), 'id', 'name', 'referenceId')
+    categories = {}
+    if any(row.get('category') for row in rows):
+        categories = lookup_table(crawler.get_component_categories(), 'id', 'name', 'referenceId')
+
+    policies = []
+    errors = []
+    names = set()
+    for line, row in enumerate(rows, start=1):
+        name = str(row.get('policy_name') or '').strip()
+        trust_zone = trust_zones.get(str(row.get('trust_zone') or '').strip().lower())
+        component_key = str(row.get('component') or '').strip().lower()
+        category_key = str(row.get('category') or '').strip().lower()
+        try:
+            stride_names = parse_stride(row.get('stride'))
+        except ValueError as e:
+            stride_names = None
+            errors.append(f"Row {line}: {e}")
+
+        if not name:
+            errors.append(f"Row {line}: missing policy_name")
+        elif policy_filename(name) in names:
+            errors.append(f"Row {line}: duplicate policy_name '{name}'")
+        names.add(policy_filename(name))
+        if trust_zone is None:
+            errors.append(f"Row {line}: unknown trust zone '{row.get('trust_zone')}'")
+        if bool(component_key) == bool(category_key):
+            errors.append(f"Row {line}: set exactly one of component or category")
+        elif component_key and component_key not in components:
+            errors.append(f"Row {line}: unknown component '{row.get('component')}'")
+        elif category_key and category_key not in categories:
+            errors.append(f"Row {line}: unknown category '{row.get('category')}'")
+        if not stride_names and stride_names is not None:
+            errors.append(f"Row {line}: no STRIDE categories selected")
+
+        policies.append({
+            'name': name,
+            'trust_zone': trust_zone,
+            'component': components.get(component_key) if component_key else None,
+            'category': categories.get(category_key) if category_key else None,
+            'stride_names': stride_names,
+            'reason': str(row.get('reason') or '').strip()
+        })
+
+    if errors:
+        for error in errors:
+            print(f"❌ {error}")
+        sys.exit(1)
+    return policies
+
+
+def attach_components(policies, crawler):
+    # Category policies cover every component of the category; each distinct
+    # category is listed once, concurrently.
+    category_names = sorted({p['category']['name'] for p in policies if p['category']})
+
+    def fetch(category_name):
+        return crawler.get_components(category_name)
+
+    members = dict(zip(category_names, ordered_map(fetch, category_names, crawler.max_workers)))
+    for policy in policies:
+        policy['components'] = members[policy['category']['name']] if policy['category'] else [policy['component']]
+
+
+def render_policy(policy, index, grouped=False):
+    if policy['category']:
+        condition = category_condition(policy['category'])
+    else:
+        condition = component_condition(policy['component'])
+    threat_ids = threat_ids_for(index, policy['components'], policy['stride_names'])
+    return render_rule(policy['name'], policy['trust_zone']['id'], condition, policy['reason'], threat_ids, grouped), len(threat_ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate Trust Zone policies (.drl) from a CSV or YAML matrix.")
+    parser.add_argument('matrix', help="CSV or YAML file with policy_name, trust_zone, component or category, stride and reason")
+    parser.add_argument('--single', metavar='FILE', help="write every rule to one .drl file instead of one file per policy")
+    parser.add_argument('--grouped', action='store_true', help="emit each rule's threat ids as one list walked by a single loop")
+    parser.add_argument('--no-cache', action='store_true', help="crawl the library again instead of reusing library_cache.json and cached responses")
+    args = parser.parse_args()
+
+    output_path, _ = read_config()
+    crawler = create_crawler(use_cache=not args.no_cache)
+
+    policies = resolve_policies(load_matrix(args.matrix), crawler)
+    print(f"📋 {len(policies)} policies loaded from {args.matrix}")
+    attach_components(policies, crawler)
+
+    components = [c for policy in policies for c in policy['components']]
+    use_case_names = set().union(*(policy['stride_names'] for policy in policies))
+    print(f"🔍 Crawling {len({c['id'] for c in components})} components...")
+    try:
+        index = crawler.build_threat_index(components, use_case_names, verbose=False)
+    except LibraryFetchError as e:
+        sys.exit(f"❌ {e}. No policies were written.")
+
+    if args.single:
+        def rendered():
+            for policy in policies:
+                rule, count = render_policy(policy, index, args.grouped)
+                print(f"   ↳ {policy['name']}: {count} threats")
+                yield rule
+
+        filepath = os.path.join(output_path, args.single)
+        with open(filepath, "w") as f:
+            write_drl(f, rendered())
+        print(f"\n✅ {len(policies)} rules written to: {filepath}")
+        return
+
+    def write_policy(policy):
+        rule, count = render_policy(policy, index, args.grouped)
+        filepath = os.path.join(output_path, policy_filename(policy['name']))
+        with open(filepath, "w") as f:
+            f.write(render_drl([rule]))
+        return filepath, count
+
+    for policy, (filepath, count) in zip(policies, ordered_map(write_policy, policies, crawler.max_workers)):
+        print(f"   ↳ {policy['name']}: {count} threats -> {filepath}")
+    print(f"\n✅ {len(policies)} Drools files written to: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 import json
 import os
 import sys
-import subprocess
+from library_crawler import create_crawler, LibraryFetchError
+from drools_policy import render_drl, render_rule, category_condition, policy_filename
 
 
 def read_config(config_path='config.json'):
@@ -31,35 +32,22 @@ def prompt_choice(title, options, multi_select=False, name_key="name"):
         return options[index] if 0 <= index < len(options) else None
 
 
-def run_script(script_name, arg=None):
-    cmd = ["python3", script_name]
-    if arg:
-        cmd.append(arg)
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"❌ Error running {script_name}:\n{result.stderr}")
-        sys.exit(1)
-    return result.stdout
-
-
-def load_tmp(filename):
-    with open(filename, "r") as f:
-        return json.load(f)
-
-
 def main():
     output_path = read_config()
+    # --no-cache forces a full crawl instead of reusing library_cache.json
+    # and the HTTP response cache;
+    # --grouped emits the threat ids as one list walked by a single loop.
+    crawler = create_crawler(use_cache="--no-cache" not in sys.argv[1:])
+    grouped = "--grouped" in sys.argv[1:]
 
     # 1. Select Trust Zone
-    run_script("fetch_trust_zones.py")
-    tz_list = load_tmp(os.path.join(output_path, "trust_zones.tmp"))
+    tz_list = crawler.get_trust_zones()
     trust_zone = prompt_choice("Select Trust Zone", tz_list)
     if not trust_zone:
         sys.exit("❌ No Trust Zone selected.")
 
     # 2. Select Component Category
-    run_script("fetch_components_categories.py")
-    categories = load_tmp(os.path.join(output_path, "component_categories.tmp"))
+    categories = crawler.get_component_categories()
     selected_cat = prompt_choice("Select Component Category", categories)
     if not selected_cat:
         sys.exit("❌ No Component Category selected.")
@@ -79,60 +67,22 @@ def main():
     # 4. Prompt for Reason & Policy Name
     reason = input("Reason for marking threats as 'Not Applicable': ").strip()
     policy_name = input("Policy name (for rule title & message): ").strip()
-    filename = f"ir_policy_{policy_name.replace(' ', '_').replace('-', '_').lower()}.drl"
-    filepath = os.path.join(output_path, filename)
-
-    # 5. Fetch Components for the selected category
-    run_script("fetch_components.py", selected_cat["name"])
-    components = load_tmp(os.path.join(output_path, "components.tmp"))
-
-    threat_ids = set()
-
-    for comp in components:
-        print(f"🔍 Component: {comp['name']}")
-        run_script("fetch_component_risk_patterns.py", comp['id'])
-        risk_patterns = load_tmp(os.path.join(output_path, "component_risk_patterns.tmp"))
-
-        for rp in risk_patterns:
-            run_script("fetch_risk_pattern_use_cases.py", rp['id'])
-            use_cases = load_tmp(os.path.join(output_path, "risk_pattern_use_cases.tmp"))
-
-            for uc in use_cases:
-                if uc['name'] not in stride_names:
-                    continue
-                print(f"   ↳ STRIDE Use Case: {uc['name']}")
-                run_script("fetch_use_case_threats.py", uc['id'])
-                threats = load_tmp(os.path.join(output_path, "use_case_threats.tmp"))
-                for threat in threats:
-                    if "referenceId" in threat:
-                        threat_ids.add(threat["referenceId"])
+    filepath = os.path.join(output_path, policy_filename(policy_name))
+
+    # 5. Stream Components for the selected category; risk patterns are
+    # fetched while later component pages are still arriving.
+    def components():
+        for comp in crawler.iter_components(selected_cat["name"]):
+            print(f"🔍 Component: {comp['name']}")
+            yield comp
+
+    try:
+        threat_ids = crawler.collect_threat_ids(components(), stride_names)
+    except LibraryFetchError as e:
+        sys.exit(f"❌ {e}. No policy was written.")
 
     # Generate Drools rule
-    drools = f"""package com.iriusrisk.drools;
-
-import com.iriusrisk.drools.model.*;
-import com.iriusrisk.drools.model.riskpattern.*;
-import com.iriusrisk.model.*;
-import com.iriusrisk.drools.fact.*;
-import com.iriusrisk.factories.DroolsValueConverter;
-import com.iriusrisk.utils.EntityWithUDTUtil;
-import com.iriusrisk.drools.fact.TagFact;
-
-rule "{policy_name}"
-no-loop
-when
-    $project : ProjectFact()
-    $component : ComponentFact()
-    TrustZoneFact($component.componentReferenceId == componentReferenceId, uuid == "{trust_zone['id']}");
-    ComponentDefinitionFact(isCategoryOf("{selected_cat['referenceId']}"), componentReferenceId == $component.componentReferenceId);
-then
-    insertLogical(new ComponentAlert(AlertType.INFO, "{policy_name}", "{reason}", $component.getComponentReferenceId()));
-"""
-
-    for threat_id in sorted(threat_ids):
-        drools += f'    insertLogical(new ChangeComponentThreatStateFact($component.getComponentReferenceId(), "{threat_id}", "Not Applicable", "{reason}"));\n'
-
-    drools += "end\n"
+    drools = render_drl([render_rule(policy_name, trust_zone['id'], category_condition(selected_cat), reason, threat_ids, grouped)])
 
     with open(filepath, "w") as f:
         f.write(drools)
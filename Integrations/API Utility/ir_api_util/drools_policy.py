@@ -0,0 +1,109 @@
+import re
+
+# Drools (.drl) rendering shared by the Trust Zone policy generators.
+# A policy marks the selected threats of a component (or of every component in
+# a category) as 'Not Applicable' while it sits in a given trust zone.
+
+DRL_HEADER = """package com.iriusrisk.drools;
+
+import com.iriusrisk.drools.model.*;
+import com.iriusrisk.drools.model.riskpattern.*;
+import com.iriusrisk.model.*;
+import com.iriusrisk.drools.fact.*;
+import com.iriusrisk.factories.DroolsValueConverter;
+import com.iriusrisk.utils.EntityWithUDTUtil;
+import com.iriusrisk.drools.fact.TagFact;
+"""
+
+STRIDE_NAMES = {
+    "S": "Spoofing",
+    "T": "Tampering",
+    "R": "Repudiation",
+    "I": "Information Disclosure",
+    "D": "Denial of Service",
+    "E": "Elevation of Privilege",
+}
+
+# Threat ids per line in the grouped (collection-driven) rule body.
+GROUPED_IDS_PER_LINE = 8
+
+
+def policy_filename(policy_name):
+    return f"ir_policy_{policy_name.replace(' ', '_').replace('-', '_').lower()}.drl"
+
+
+def component_condition(component):
+    return f'uniqueId == "{component["referenceId"]}"'
+
+
+def category_condition(category):
+    return f'isCategoryOf("{category["referenceId"]}")'
+
+
+def parse_stride(value):
+    # Accepts letters ("STI"), names, or a comma/semicolon separated mix of both.
+    if isinstance(value, (list, tuple)):
+        tokens = [str(v).strip() for v in value]
+    else:
+        tokens = [t.strip() for t in re.split(r"[,;|]", str(value or ""))]
+    names = set()
+    by_name = {name.lower(): name for name in STRIDE_NAMES.values()}
+    for token in filter(None, tokens):
+        if token.lower() in by_name:
+            names.add(by_name[token.lower()])
+        elif token.isalpha() and all(letter in STRIDE_NAMES for letter in token.upper()):
+            names.update(STRIDE_NAMES[letter] for letter in token.upper())
+        else:
+            raise ValueError(f"Unknown STRIDE category: {token}")
+    return names
+
+
+def drl_string(value):
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def render_rule(policy_name, trust_zone_id, definition_condition, reason, threat_ids, grouped=False):
+    # The body is built as a list of lines and joined once. With grouped=True
+    # the threat ids become a single list literal walked by one loop instead
+    # of one insertLogical statement per threat, which keeps rules for broad
+    # components small.
+    name = drl_string(policy_name)
+    reason = drl_string(reason)
+    lines = [
+        f'rule {name}',
+        "no-loop",
+        "when",
+        "    $project : ProjectFact()",
+        "    $component : ComponentFact()",
+        f'    TrustZoneFact($component.componentReferenceId == componentReferenceId, uuid == "{trust_zone_id}");',
+        f"    ComponentDefinitionFact({definition_condition}, componentReferenceId == $component.componentReferenceId);",
+        "then",
+        f'    insertLogical(new ComponentAlert(AlertType.INFO, {name}, {reason}, $component.getComponentReferenceId()));',
+    ]
+    threat_ids = [drl_string(threat_id) for threat_id in sorted(threat_ids)]
+    if grouped and threat_ids:
+        chunks = [", ".join(threat_ids[i:i + GROUPED_IDS_PER_LINE])
+                  for i in range(0, len(threat_ids), GROUPED_IDS_PER_LINE)]
+        lines.append("    for (String threatId : java.util.Arrays.asList(")
+        lines.append(",\n".join(f"            {chunk}" for chunk in chunks))
+        lines.append("    )) {")
+        lines.append(f'        insertLogical(new ChangeComponentThreatStateFact($component.getComponentReferenceId(), threatId, "Not Applicable", {reason}));')
+        lines.append("    }")
+    else:
+        for threat_id in threat_ids:
+            lines.append(f'    insertLogical(new ChangeComponentThreatStateFact($component.getComponentReferenceId(), {threat_id}, "Not Applicable", {reason}));')
+    lines.append("end")
+    return "\n".join(lines) + "\n"
+
+
+def render_drl(rules):
+    return "\n".join([DRL_HEADER] + list(rules))
+
+
+def write_drl(f, rules):
+    # Same output as render_drl, written rule by rule so a large policy
+    # library never has to exist as one string.
+    f.write(DRL_HEADER)
+    for rule in rules:
+        f.write("\n")
+        f.write(rule)
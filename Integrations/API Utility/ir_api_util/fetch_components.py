@@ -3,6 +3,7 @@ import sys
 import json
 import requests
 import urllib.parse
+from api_client import get_session
 
 
 def read_config(config_path='config.json'):
@@ -30,8 +31,8 @@ def read_credentials(token_path='~/ir/.ir_user_token', domain_path='~/ir/ir_inst
         sys.exit(1)
 
 
-def fetch_components(output_path, page_size, api_token, instance_domain, category_name=None):
-    all_items = []
+def iter_component_pages(page_size, api_token, instance_domain, category_name=None, verbose=True):
+    # Yields each page of components as soon as it arrives.
     page = 0
     headers = {
         "Accept": "application/hal+json",
@@ -46,20 +47,21 @@ def fetch_components(output_path, page_size, api_token, instance_domain, categor
         filter_clause = "'category.name'<>'Deprecated'"
     encoded_filter = urllib.parse.quote(filter_clause)
 
-    print(f"📡 Fetching components for category: {category_name or 'ALL (non-deprecated)'}")
+    if verbose:
+        print(f"📡 Fetching components for category: {category_name or 'ALL (non-deprecated)'}")
     while True:
         url = (
             f"https://{instance_domain}.iriusrisk.com/api/v2/components"
             f"?filter={encoded_filter}&size={page_size}&page={page}"
         )
         try:
-            print(f"🔄 Requesting page {page}...")
-            response = requests.get(url, headers=headers)
+            if verbose:
+                print(f"🔄 Requesting page {page}...")
+            response = get_session().get(url, headers=headers)
             response.raise_for_status()
             data = response.json()
 
-            items = data.get("_embedded", {}).get("items", [])
-            all_items.extend(items)
+            yield data.get("_embedded", {}).get("items", [])
 
             page_info = data.get("page", {})
             if page >= page_info.get("totalPages", 1) - 1:
@@ -76,18 +78,58 @@ def fetch_components(output_path, page_size, api_token, instance_domain, categor
             print(f"❌ Unexpected Error: {e}")
             break
 
-    file_path = os.path.join(output_path, "components.tmp")
+
+def iter_components(page_size, api_token, instance_domain, category_name=None, verbose=True):
+    for items in iter_component_pages(page_size, api_token, instance_domain, category_name, verbose):
+        yield from items
+
+
+def get_components(page_size, api_token, instance_domain, category_name=None, verbose=True):
+    return list(iter_components(page_size, api_token, instance_domain, category_name, verbose))
+
+
+def write_ndjson(items, file_path):
+    count = 0
     with open(file_path, "w") as f:
-        json.dump(all_items, f, indent=2)
-    print(f"✅ Saved {len(all_items)} components to: {file_path}")
+        for item in items:
+            f.write(json.dumps(item))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def write_json_array(items, file_path):
+    # Same layout as json.dump(list, indent=2), written one item at a time.
+    count = 0
+    with open(file_path, "w") as f:
+        f.write("[")
+        for item in items:
+            f.write(",\n  " if count else "\n  ")
+            f.write(json.dumps(item, indent=2).replace("\n", "\n  "))
+            count += 1
+        f.write("\n]" if count else "]")
+    return count
+
+
+def fetch_components(output_path, page_size, api_token, instance_domain, category_name=None, ndjson=False):
+    items = iter_components(page_size, api_token, instance_domain, category_name)
+    if ndjson:
+        file_path = os.path.join(output_path, "components.ndjson")
+        count = write_ndjson(items, file_path)
+    else:
+        file_path = os.path.join(output_path, "components.tmp")
+        count = write_json_array(items, file_path)
+    print(f"✅ Saved {count} components to: {file_path}")
 
 
 if __name__ == "__main__":
     output_path, page_size = read_config()
     api_token, instance_domain = read_credentials()
 
-    category_name = None
-    if len(sys.argv) > 1:
-        category_name = sys.argv[1]
+    # Usage: python3 fetch_components.py [category_name] [--ndjson]
+    args = sys.argv[1:]
+    ndjson = "--ndjson" in args
+    args = [arg for arg in args if arg != "--ndjson"]
+    category_name = args[0] if args else None
 
-    fetch_components(output_path, page_size, api_token, instance_domain, category_name)
+    fetch_components(output_path, page_size, api_token, instance_domain, category_name, ndjson)
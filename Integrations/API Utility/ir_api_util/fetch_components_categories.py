@@ -2,6 +2,7 @@ import os
 import sys
 import json
 import requests
+from api_client import get_session
 
 
 def read_config(config_path='config.json'):
@@ -29,7 +30,7 @@ def read_credentials(token_path='~/ir/.ir_user_token', domain_path='~/ir/ir_inst
         sys.exit(1)
 
 
-def fetch_component_categories(output_path, page_size, api_token, instance_domain):
+def get_component_categories(page_size, api_token, instance_domain, verbose=True):
     all_items = []
     page = 0
     headers = {
@@ -38,15 +39,17 @@ def fetch_component_categories(output_path, page_size, api_token, instance_domai
         "api-token": api_token
     }
 
-    print("📡 Fetching component categories with pagination...")
+    if verbose:
+        print("📡 Fetching component categories with pagination...")
     while True:
         url = (
             f"https://{instance_domain}.iriusrisk.com/api/v2/components/categories/summary"
             f"?filter='name'<>'Deprecated'&size={page_size}&page={page}"
         )
         try:
-            print(f"🔄 Requesting page {page}...")
-            response = requests.get(url, headers=headers)
+            if verbose:
+                print(f"🔄 Requesting page {page}...")
+            response = get_session().get(url, headers=headers)
             response.raise_for_status()
             data = response.json()
 
@@ -68,6 +71,11 @@ def fetch_component_categories(output_path, page_size, api_token, instance_domai
             print(f"❌ Unexpected Error: {e}")
             break
 
+    return all_items
+
+
+def fetch_component_categories(output_path, page_size, api_token, instance_domain):
+    all_items = get_component_categories(page_size, api_token, instance_domain)
     file_path = os.path.join(output_path, "component_categories.tmp")
     with open(file_path, "w") as f:
         json.dump(all_items, f, indent=2)
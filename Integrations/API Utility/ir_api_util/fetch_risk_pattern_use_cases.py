@@ -2,6 +2,7 @@ import os
 import sys
 import json
 import requests
+from api_client import get_session
 
 
 def read_config(config_path='config.json'):
@@ -29,7 +30,9 @@ def read_credentials(token_path='~/ir/.ir_user_token', domain_path='~/ir/ir_inst
         sys.exit(1)
 
 
-def fetch_risk_pattern_use_cases(risk_pattern_id, output_path, page_size, api_token, instance_domain):
+def get_risk_pattern_use_cases(risk_pattern_id, page_size, api_token, instance_domain, verbose=True, raise_errors=False):
+    # With raise_errors the error is re-raised instead of returning the
+    # items read so far, so callers can tell a partial list from a full one.
     all_items = []
     page = 0
     headers = {
@@ -38,7 +41,8 @@ def fetch_risk_pattern_use_cases(risk_pattern_id, output_path, page_size, api_to
         "api-token": api_token
     }
 
-    print(f"📡 Fetching use cases for risk pattern ID: {risk_pattern_id}")
+    if verbose:
+        print(f"📡 Fetching use cases for risk pattern ID: {risk_pattern_id}")
 
     while True:
         url = (
@@ -46,8 +50,9 @@ def fetch_risk_pattern_use_cases(risk_pattern_id, output_path, page_size, api_to
             f"?size={page_size}&page={page}"
         )
         try:
-            print(f"🔄 Page {page} ...")
-            response = requests.get(url, headers=headers)
+            if verbose:
+                print(f"🔄 Page {page} ...")
+            response = get_session().get(url, headers=headers)
             response.raise_for_status()
             data = response.json()
 
@@ -61,14 +66,25 @@ def fetch_risk_pattern_use_cases(risk_pattern_id, output_path, page_size, api_to
 
         except requests.HTTPError as e:
             print(f"❌ HTTP Error: {e}\nResponse: {response.text[:300]}")
+            if raise_errors:
+                raise
             break
         except requests.RequestException as e:
             print(f"❌ Request Error: {e}")
+            if raise_errors:
+                raise
             break
         except Exception as e:
             print(f"❌ Unexpected Error: {e}")
+            if raise_errors:
+                raise
             break
 
+    return all_items
+
+
+def fetch_risk_pattern_use_cases(risk_pattern_id, output_path, page_size, api_token, instance_domain):
+    all_items = get_risk_pattern_use_cases(risk_pattern_id, page_size, api_token, instance_domain)
     out_path = os.path.join(output_path, "risk_pattern_use_cases.tmp")
     with open(out_path, "w") as f:
         json.dump(all_items, f, indent=2)
@@ -2,6 +2,7 @@ import os
 import sys
 import json
 import requests
+from api_client import get_session
 
 
 def read_config(config_path='config.json'):
@@ -43,7 +44,7 @@ def fetch_trust_zones(api_token, instance_domain, page_size):
         url = f"https://{instance_domain}.iriusrisk.com/api/v2/trust-zones?size={page_size}&page={page}"
         try:
             print(f"🔄 Page {page}...")
-            response = requests.get(url, headers=headers)
+            response = get_session().get(url, headers=headers)
             response.raise_for_status()
             data = response.json()
             items = data.get("_embedded", {}).get("items", [])
@@ -2,6 +2,7 @@ import sys
 import requests
 import os
 import json
+from api_client import get_session
 
 def read_config(config_path='config.json'):
     try:
@@ -42,7 +43,7 @@ class GetProjectList:
             'api-token': self.api_token
         }
         try:
-            response = requests.get(url, headers=headers)
+            response = get_session().get(url, headers=headers)
             response.raise_for_status()  # Raises HTTPError for bad responses
             data = response.json()
             # Write to a file
@@ -1,8 +1,11 @@
 import sys
 import os
 import requests
-import pandas as pd
+import csv
 import json
+from api_client import get_session, ordered_map, read_max_workers
+
+COLUMNS = ['Project', 'Component', 'Control Name', 'Control Status', 'Priority']
 
 def read_config(config_path='config.json'):
     try:
@@ -19,11 +22,12 @@ def read_config(config_path='config.json'):
         return output_path
 
 class ProjectComponentStatus:
-    def __init__(self, api_token_path='~/ir/.ir_user_token', instance_domain_path='~/ir/ir_instance_domain'):
+    def __init__(self, api_token_path='~/ir/.ir_user_token', instance_domain_path='~/ir/ir_instance_domain', max_workers=None):
         self.api_token_path = os.path.expanduser(api_token_path)
         self.instance_domain_path = os.path.expanduser(instance_domain_path)
         self.api_token, self.instance_domain = self.read_credentials()
         self.output_path = read_config()
+        self.max_workers = max_workers or read_max_workers()
 
     def read_credentials(self):
         try:
@@ -36,62 +40,86 @@ class ProjectComponentStatus:
             print(f"Error: {e}. Make sure the paths are correct.")
             sys.exit(1)  # Exit if credentials cannot be read
 
-    def fetch_and_export_control_details(self, project_ref):
-        df_data = {'Project': [], 'Component': [], 'Control Name': [], 'Control Status': [], 'Priority': []}
-        processed_projects = set()  # To avoid processing a project more than once
-        self._fetch_project_details(project_ref, df_data, processed_projects)
+    def fetch_and_export_control_details(self, project_ref, max_depth=None):
+        csv_file = os.path.join(self.output_path, f'{project_ref}_control_data.csv')
+        excel_file = os.path.join(self.output_path, f'{project_ref}_control_data.xlsx')
+
+        # Rows are written to the CSV as each project arrives; the Excel copy
+        # is built from the finished CSV.
+        row_count = 0
+        with open(csv_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            for row in self.iter_control_rows(project_ref, max_depth):
+                writer.writerow(row)
+                row_count += 1
 
         # Export to CSV and Excel if data is available
-        if df_data['Project']:
-            df = pd.DataFrame(df_data)
-            csv_file = os.path.join(self.output_path, f'{project_ref}_control_data.csv')
-            excel_file = os.path.join(self.output_path, f'{project_ref}_control_data.xlsx')
-            df.to_csv(csv_file, index=False)
-            df.to_excel(excel_file, index=False)
+        if row_count:
+            import pandas as pd
+            pd.read_csv(csv_file, dtype=str, keep_default_na=False).to_excel(excel_file, index=False)
             print(f"Data exported to {csv_file} and {excel_file}")
             print("")
         else:
+            os.remove(csv_file)
             print("No control data found for the specified project and related projects.")
             print("")
 
-    def _fetch_project_details(self, project_ref, df_data, processed_projects):
-        if project_ref in processed_projects:
-            return  # Skip if already processed
-        processed_projects.add(project_ref)
+    def iter_control_rows(self, project_ref, max_depth=None):
+        # Breadth-first walk from project_ref through the projects named in
+        # component tags. Each level is fetched concurrently, every project is
+        # visited once, and max_depth (None for no limit) caps how many tag
+        # hops are followed from the target project.
+        processed_projects = {project_ref}
+        level = [project_ref]
+        depth = 0
+        while level:
+            next_level = []
+            for ref, components in zip(level, ordered_map(self._fetch_project_components, level, self.max_workers)):
+                for component in components:
+                    yield from self._process_component(ref, component)
+                    for tag in component.get('tags', []):
+                        if tag not in processed_projects:
+                            processed_projects.add(tag)
+                            next_level.append(tag)
+            depth += 1
+            if max_depth is not None and depth > max_depth:
+                break
+            level = next_level
 
+    def _fetch_project_components(self, project_ref):
         url = f'https://{self.instance_domain}.iriusrisk.com/api/v1/products/{project_ref}'
         try:
-            response = requests.get(url, headers={'Accept': 'application/json', 'api-token': self.api_token})
+            response = get_session().get(url, headers={'Accept': 'application/json', 'api-token': self.api_token})
             response.raise_for_status()  # Raises HTTPError for bad responses
-            data = response.json()
-            components = data.get('components', [])
-            for component in components:
-                self._process_component(project_ref, component, df_data)
-                # Process component tags for referenced projects
-                for tag in component.get('tags', []):
-                    if tag != project_ref:  # Avoid duplicating the target project
-                        self._fetch_project_details(tag, df_data, processed_projects)
+            return response.json().get('components', [])
         except requests.HTTPError as e:
             print(f"HTTP Error: {e}")
         except requests.RequestException as e:
             print(f"Error fetching project details: {e}")
+        return []
 
-    def _process_component(self, project_ref, component, df_data):
+    def _process_component(self, project_ref, component):
         controls = component.get('controls', [])
         for control in controls:
-            df_data['Project'].append(project_ref)
-            df_data['Component'].append(component.get('name', 'No Component'))
-            df_data['Control Name'].append(control.get('name', 'No Name'))
-            df_data['Control Status'].append(control.get('state', 'No Status'))
-            df_data['Priority'].append(control.get('priority', 'No Priority'))
+            yield (project_ref,
+                   component.get('name', 'No Component'),
+                   control.get('name', 'No Name'),
+                   control.get('state', 'No Status'),
+                   control.get('priority', 'No Priority'))
 
-def main(project_ref):
+def main(project_ref, max_depth=None):
     pcs = ProjectComponentStatus()
-    pcs.fetch_and_export_control_details(project_ref)
+    pcs.fetch_and_export_control_details(project_ref, max_depth)
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python getProject_CM_Status.py <project_ref>")
+    args = sys.argv[1:]
+    max_depth = None
+    if len(args) == 3 and args[1] == '--max-depth' and args[2].isdigit():
+        max_depth = int(args[2])
+        args = args[:1]
+    if len(args) != 1:
+        print("Usage: python getProject_CM_Status.py <project_ref> [--max-depth N]")
         sys.exit(1)
-    project_ref = sys.argv[1]
-    main(project_ref)
+    project_ref = args[0]
+    main(project_ref, max_depth)
@@ -1,8 +1,15 @@
 import sys
 import os
+import csv
+import argparse
 import requests
-import pandas as pd
 import json
+import urllib.parse
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from api_client import get_session, ordered_map, read_max_workers
 
 def read_config(config_path='config.json'):
     try:
@@ -17,12 +24,215 @@ def read_config(config_path='config.json'):
         os.makedirs(output_path, exist_ok=True)
         return output_path
 
+COLUMNS = [
+    'Project', 'Component', 'Use case', 'Type',
+    'Threat', 'Threat Ref', 'Inherent Risk', 'Current Risk', 'Projected Risk', 'Owner', 'STRIDE-LM',
+    'Weakness', 'Weakness Ref',
+    'Countermeasure', 'Countermeasure Ref', 'State', 'Priority', 'Scope', 'Standard Baseline',
+    'Standard Section', 'Mitre Reference', 'Test result', 'Cost',
+    'Reference Name', 'Reference URL',
+    'Standard Name', 'Standard Ref'
+]
+# Rows are tuples in COLUMNS order, assembled from these fixed-width segments.
+EMPTY_WEAKNESS = ('', '')
+EMPTY_COUNTERMEASURE = ('',) * 10
+EMPTY_REFERENCE = ('', '')
+EMPTY_STANDARD = ('', '')
+WRITE_BATCH_ROWS = 5000
+PROJECT_PAGE_SIZE = 1000
+XLSX_MAX_ROWS = 1048576
+
+class XlsxRowWriter:
+    extension = 'xlsx'
+
+    def __init__(self, file_path, columns):
+        # constant_memory flushes each row to disk once the next one starts,
+        # so the workbook never holds more than a row at a time. Values are
+        # written as plain strings: URL conversion stops at Excel's 65,530
+        # links per sheet and drops the rest, and text starting with "="
+        # would otherwise become a formula.
+        import xlsxwriter
+        self.workbook = xlsxwriter.Workbook(file_path, {
+            'constant_memory': True,
+            'strings_to_urls': False,
+            'strings_to_formulas': False,
+            'strings_to_numbers': False
+        })
+        self.columns = columns
+        self.sheet = None
+        self.sheet_count = 0
+        self.next_row = XLSX_MAX_ROWS
+
+    def add_sheet(self):
+        self.sheet_count += 1
+        self.sheet = self.workbook.add_worksheet('Sheet1' if self.sheet_count == 1 else f'Sheet{self.sheet_count}')
+        self.sheet.write_row(0, 0, self.columns)
+        self.next_row = 1
+
+    def write_rows(self, rows):
+        for row in rows:
+            if self.next_row >= XLSX_MAX_ROWS:
+                self.add_sheet()  # Excel caps a sheet at 1,048,576 rows; continue on the next one.
+            self.sheet.write_row(self.next_row, 0, row)
+            self.next_row += 1
+
+    def close(self):
+        if self.sheet is None:
+            self.add_sheet()
+        self.workbook.close()
+
+class CsvRowWriter:
+    extension = 'csv'
+
+    def __init__(self, file_path, columns):
+        self.file = open(file_path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+class ParquetRowWriter:
+    extension = 'parquet'
+
+    def __init__(self, file_path, columns):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.pa = pa
+        # Values mix numbers and blanks across rows, so every column is stored as text.
+        self.schema = pa.schema([(column, pa.string()) for column in columns])
+        self.writer = pq.ParquetWriter(file_path, self.schema)
+
+    def write_rows(self, rows):
+        # One row group per batch, built column by column.
+        if not rows:
+            return
+        arrays = [self.pa.array([None if value in ('', None) else str(value) for value in column], type=self.pa.string())
+                  for column in zip(*rows)]
+        self.writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+EXPORT_FORMATS = {
+    'xlsx': XlsxRowWriter,
+    'csv': CsvRowWriter,
+    'parquet': ParquetRowWriter
+}
+
+def extract_udt_value(obj, udt_key):
+    for udt in obj.get("udts", []):
+        if udt.get("ref") == udt_key:
+            return udt.get("value", "")
+    return ""
+
+def countermeasure_segment(control, control_ref):
+    return (
+        control.get("name", ""),
+        control_ref,
+        control.get("state", ""),
+        control.get("priority", ""),
+        extract_udt_value(control, "SF-C-SCOPE"),
+        extract_udt_value(control, "SF-C-STANDARD-BASELINE"),
+        extract_udt_value(control, "SF-C-STANDARD-SECTION"),
+        extract_udt_value(control, "SF-C-MITRE"),
+        (control.get("test", {}) or {}).get("source", {}).get("result", ""),
+        control.get("cost", '')
+    )
+
+def iter_hierarchy_rows(project_ref, project_data, include_references=True, include_standards=False):
+    # Yields one tuple per Threat / Weakness / Countermeasure / Reference /
+    # Standard row. Shared segments are built once and reused, and the
+    # countermeasure columns are computed once per component control
+    # rather than for every threat that references it.
+    component_controls = {}
+    for component in project_data.get("components", []):
+        component_controls[component.get("ref", "")] = {ctrl["ref"]: ctrl for ctrl in component.get("controls", [])}
+
+    for component in project_data.get("components", []):
+        component_name = component.get("name", "Unknown Component")
+        component_ref = component.get("ref", "")
+        controls = component_controls.get(component_ref, {})
+        countermeasures = {}
+
+        for usecase in component.get("usecases", []):
+            prefix = (project_ref, component_name, usecase.get("name", "Unknown Use Case"))
+
+            for threat in usecase.get("threats", []):
+                threat_segment = (
+                    threat.get("name", "Unknown Threat"),
+                    threat.get("ref", ""),
+                    threat.get("inherentRisk", ''),
+                    threat.get("risk", ''),
+                    threat.get("projectedRisk", ''),
+                    threat.get("owner", ''),
+                    extract_udt_value(threat, "SF-T-STRIDE-LM")
+                )
+                yield prefix + ('Threat',) + threat_segment + EMPTY_WEAKNESS + EMPTY_COUNTERMEASURE + EMPTY_REFERENCE + EMPTY_STANDARD
+
+                for weakness in threat.get("weaknesses", []):
+                    yield (prefix + ('Weakness',) + threat_segment
+                           + (weakness.get("name", ""), weakness.get("ref", ""))
+                           + EMPTY_COUNTERMEASURE + EMPTY_REFERENCE + EMPTY_STANDARD)
+
+                for control in threat.get("controls") or []:
+                    countermeasure_ref = control.get("ref", "")
+                    full_control_data = controls.get(countermeasure_ref, {}) or {}
+                    if countermeasure_ref not in countermeasures:
+                        countermeasures[countermeasure_ref] = countermeasure_segment(full_control_data, countermeasure_ref)
+                    cm_segment = countermeasures[countermeasure_ref]
+                    yield (prefix + ('Countermeasure',) + threat_segment + EMPTY_WEAKNESS
+                           + cm_segment + EMPTY_REFERENCE + EMPTY_STANDARD)
+
+                    if include_references:
+                        for ref in full_control_data.get("references", []) or []:
+                            yield (prefix + ('Reference',) + threat_segment + EMPTY_WEAKNESS + cm_segment
+                                   + (ref.get("name", ""), ref.get("url", "")) + EMPTY_STANDARD)
+
+                    if include_standards:
+                        for std in full_control_data.get("standards", []) or []:
+                            yield (prefix + ('Standard',) + threat_segment + EMPTY_WEAKNESS + cm_segment
+                                   + EMPTY_REFERENCE + (std.get("name", ""), std.get("ref", "")))
+
+def write_rows(writer, rows):
+    batch = []
+    count = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= WRITE_BATCH_ROWS:
+            writer.write_rows(batch)
+            count += len(batch)
+            batch = []
+    writer.write_rows(batch)
+    return count + len(batch)
+
+def export_partition(project_ref, project_data, dataset_dir, fmt, include_references, include_standards):
+    # Runs in a worker process: flattens one project payload straight into
+    # its own partition file and only sends the row count back.
+    safe_ref = urllib.parse.quote(project_ref, safe='')
+    partition_dir = os.path.join(dataset_dir, f'project_ref={safe_ref}')
+    os.makedirs(partition_dir, exist_ok=True)
+    part_file = os.path.join(partition_dir, f'part-0.{EXPORT_FORMATS[fmt].extension}')
+    writer = EXPORT_FORMATS[fmt](part_file, COLUMNS)
+    try:
+        row_count = write_rows(writer, iter_hierarchy_rows(project_ref, project_data, include_references, include_standards))
+    except Exception:
+        writer.close()
+        os.remove(part_file)  # Never leave a truncated partition in the dataset.
+        raise
+    writer.close()
+    return row_count
+
 class ProjectComponentStatus:
-    def __init__(self, api_token_path='~/ir/.ir_user_token', instance_domain_path='~/ir/ir_instance_domain'):
+    def __init__(self, api_token_path='~/ir/.ir_user_token', instance_domain_path='~/ir/ir_instance_domain', max_workers=None):
         self.api_token_path = os.path.expanduser(api_token_path)
         self.instance_domain_path = os.path.expanduser(instance_domain_path)
         self.api_token, self.instance_domain = self.read_credentials()
         self.output_path = read_config()
+        self.max_workers = max_workers or read_max_workers()
         
         # Toggle options
         self.include_references = True
@@ -39,133 +249,125 @@ class ProjectComponentStatus:
             print(f"Error: {e}. Make sure the paths are correct.")
             sys.exit(1)
     
-    def extract_udt_value(self, obj, udt_key):
-        for udt in obj.get("udts", []):
-            if udt.get("ref") == udt_key:
-                return udt.get("value", "")
-        return ""
-
-    def fetch_and_export_data(self, project_ref):
+    def fetch_project(self, project_ref):
         url = f'https://{self.instance_domain}.iriusrisk.com/api/v1/products/{project_ref}'
         try:
-            response = requests.get(url, headers={'Accept': 'application/json', 'api-token': self.api_token})
+            response = get_session().get(url, headers={'Accept': 'application/json', 'api-token': self.api_token})
             response.raise_for_status()
-            project_data = response.json()
+            return response.json()
         except requests.RequestException as e:
             print(f"Error fetching project data: {e}")
+            return None
+
+    def fetch_and_export_data(self, project_ref, fmt='xlsx'):
+        project_data = self.fetch_project(project_ref)
+        if project_data is None:
             return
 
-        df_data = []
-
-        component_controls = {}
-        for component in project_data.get("components", []):
-            component_controls[component.get("ref", "")] = {ctrl["ref"]: ctrl for ctrl in component.get("controls", [])}
-
-        for component in project_data.get("components", []):
-            component_name = component.get("name", "Unknown Component")
-            component_ref = component.get("ref", "")
-
-            for usecase in component.get("usecases", []):
-                usecase_name = usecase.get("name", "Unknown Use Case")
-
-                for threat in usecase.get("threats", []):
-                    threat_name = threat.get("name", "Unknown Threat")
-                    threat_ref = threat.get("ref", "")
-
-                    threat_data = {
-                        'Project': project_ref,
-                        'Component': component_name,
-                        'Use case': usecase_name,
-                        'Type': 'Threat',
-                        'Threat': threat_name,
-                        'Threat Ref': threat_ref,
-                        'Inherent Risk': threat.get("inherentRisk", ''),
-                        'Current Risk': threat.get("risk", ''),
-                        'Projected Risk': threat.get("projectedRisk", ''),
-                        'Owner': threat.get("owner", ''),
-                        'STRIDE-LM': self.extract_udt_value(threat, "SF-T-STRIDE-LM"),
-                        'Weakness': '',
-                        'Weakness Ref': '',
-                        'Countermeasure': '',
-                        'Countermeasure Ref': '',
-                        'State': '',
-                        'Priority': '',
-                        'Scope': '',
-                        'Standard Baseline': '',
-                        'Standard Section': '',
-                        'Mitre Reference': '',
-                        'Test result': '',
-                        'Cost': '',
-                        'Reference Name': '',
-                        'Reference URL': '',
-                        'Standard Name': '',
-                        'Standard Ref': ''
-                    }
-                    df_data.append(threat_data)
-
-                    for weakness in threat.get("weaknesses", []):
-                        weakness_data = threat_data.copy()
-                        weakness_data.update({
-                            'Type': 'Weakness',
-                            'Weakness': weakness.get("name", ""),
-                            'Weakness Ref': weakness.get("ref", "")
-                        })
-                        df_data.append(weakness_data)
-
-                    if "controls" in threat and threat["controls"]:
-                        for control in threat["controls"]:
-                            countermeasure_ref = control.get("ref", "")
-                            full_control_data = component_controls.get(component_ref, {}).get(countermeasure_ref, {}) or {}
-
-                            countermeasure_data = threat_data.copy()
-                            countermeasure_data.update({
-                                'Type': 'Countermeasure',
-                                'Countermeasure': full_control_data.get("name", ""),
-                                'Countermeasure Ref': countermeasure_ref,
-                                'State': full_control_data.get("state", ""),
-                                'Priority': full_control_data.get("priority", ""),
-                                'Scope': self.extract_udt_value(full_control_data, "SF-C-SCOPE"),
-                                'Standard Baseline': self.extract_udt_value(full_control_data, "SF-C-STANDARD-BASELINE"),
-                                'Standard Section': self.extract_udt_value(full_control_data, "SF-C-STANDARD-SECTION"),
-                                'Mitre Reference': self.extract_udt_value(full_control_data, "SF-C-MITRE"),
-                                'Test result': (full_control_data.get("test", {}) or {}).get("source", {}).get("result", ""),
-                                'Cost': full_control_data.get("cost", '')
-                            })
-                            df_data.append(countermeasure_data)
-                            
-                            if self.include_references:
-                                for ref in full_control_data.get("references", []) or []:
-                                    reference_data = countermeasure_data.copy()
-                                    reference_data.update({
-                                        'Type': 'Reference',
-                                        'Reference Name': ref.get("name", ""),
-                                        'Reference URL': ref.get("url", "")
-                                    })
-                                    df_data.append(reference_data)
-                            
-                            if self.include_standards:
-                                for std in full_control_data.get("standards", []) or []:
-                                    standard_data = countermeasure_data.copy()
-                                    standard_data.update({
-                                        'Type': 'Standard',
-                                        'Standard Name': std.get("name", ""),
-                                        'Standard Ref': std.get("ref", "")
-                                    })
-                                    df_data.append(standard_data)
-
-        df = pd.DataFrame(df_data)
-        file_suffix = f"_stnds_{'on' if self.include_standards else 'off'}_refs_{'on' if self.include_references else 'off'}.xlsx"
-        excel_file = os.path.join(self.output_path, f'{project_ref}_hierarchical_data{file_suffix}')
-        df.to_excel(excel_file, index=False)
-        print(f"Data exported to {excel_file}")
-
-def main(project_ref):
+        file_suffix = f"_stnds_{'on' if self.include_standards else 'off'}_refs_{'on' if self.include_references else 'off'}.{EXPORT_FORMATS[fmt].extension}"
+        export_file = os.path.join(self.output_path, f'{project_ref}_hierarchical_data{file_suffix}')
+        writer = EXPORT_FORMATS[fmt](export_file, COLUMNS)
+        try:
+            row_count = write_rows(writer, iter_hierarchy_rows(project_ref, project_data, self.include_references, self.include_standards))
+        finally:
+            writer.close()
+        print(f"Data exported to {export_file} ({row_count} rows)")
+
+    def list_project_refs(self, filter_expr):
+        # Reference IDs of every project matching a v2 projects filter,
+        # e.g. "'tags'~'portfolio'".
+        headers = {'Accept': 'application/hal+json', 'api-token': self.api_token}
+        encoded_filter = urllib.parse.quote(filter_expr)
+
+        def fetch(page):
+            url = (f'https://{self.instance_domain}.iriusrisk.com/api/v2/projects'
+                   f'?filter={encoded_filter}&size={PROJECT_PAGE_SIZE}&page={page}')
+            response = get_session().get(url, headers=headers)
+            response.raise_for_status()
+            return response.json()
+
+        try:
+            first_page = fetch(0)
+            pages = [first_page] + list(ordered_map(fetch, range(1, first_page.get('page', {}).get('totalPages', 1)), self.max_workers))
+        except requests.RequestException as e:
+            print(f"Error listing projects: {e}")
+            return []
+        return [item['referenceId'] for page in pages for item in page.get('_embedded', {}).get('items', [])]
+
+    def export_portfolio(self, project_refs, fmt='parquet', processes=None):
+        # Payloads are downloaded concurrently on the shared session and
+        # flattened on a process pool, one partition per project, into a
+        # single dataset directory. At most 2 * processes payloads are held
+        # in memory while waiting for a worker. Workers are spawned rather
+        # than forked: the pool starts while the fetch threads hold session
+        # and connection locks, which a forked child would inherit locked.
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        dataset_dir = os.path.join(self.output_path, f"portfolio_hierarchical_data_stnds_{'on' if self.include_standards else 'off'}_refs_{'on' if self.include_references else 'off'}_{stamp}")
+        os.makedirs(dataset_dir, exist_ok=True)
+        processes = processes or os.cpu_count() or 1
+        print(f"Exporting {len(project_refs)} projects to {dataset_dir}")
+
+        exported, failed, row_count = 0, [], 0
+        pending = deque()
+
+        def collect(ref, future):
+            nonlocal exported, row_count
+            try:
+                row_count += future.result()
+                exported += 1
+            except Exception as e:
+                print(f"Error exporting {ref}: {e}")
+                failed.append(ref)
+
+        with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn')) as pool:
+            for ref, project_data in zip(project_refs, ordered_map(self.fetch_project, project_refs, self.max_workers)):
+                if project_data is None:
+                    failed.append(ref)
+                    continue
+                pending.append((ref, pool.submit(export_partition, ref, project_data, dataset_dir, fmt,
+                                                 self.include_references, self.include_standards)))
+                if len(pending) >= processes * 2:
+                    collect(*pending.popleft())
+            while pending:
+                collect(*pending.popleft())
+
+        print(f"Data exported to {dataset_dir} ({exported} projects, {row_count} rows)")
+        if failed:
+            print(f"Projects not exported: {', '.join(failed)}")
+        return dataset_dir
+
+def read_project_refs(file_path):
+    with open(os.path.expanduser(file_path), 'r') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+def main(project_ref, fmt='xlsx'):
     pcs = ProjectComponentStatus()
-    pcs.fetch_and_export_data(project_ref)
+    pcs.fetch_and_export_data(project_ref, fmt)
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python getProject_Threat_Hierarchy_Data.py <project_ref>")
-        sys.exit(1)
-    project_ref = sys.argv[1]
-    main(project_ref)
+    parser = argparse.ArgumentParser(description="Export the threat hierarchy of one or more IriusRisk projects.")
+    parser.add_argument('project_refs', nargs='*', metavar='project_ref', help="project reference ID(s)")
+    parser.add_argument('--projects-file', help="file with one project reference ID per line")
+    parser.add_argument('--filter', help="v2 projects filter selecting the projects to export, e.g. \"'tags'~'portfolio'\"")
+    parser.add_argument('--format', choices=list(EXPORT_FORMATS),
+                        help="output format (default: xlsx for one project, parquet for a portfolio)")
+    parser.add_argument('--processes', type=int, help="worker processes used to flatten a portfolio (default: CPU count)")
+    args = parser.parse_args()
+
+    if len(args.project_refs) == 1 and not (args.projects_file or args.filter):
+        main(args.project_refs[0], args.format or 'xlsx')
+        sys.exit(0)
+
+    # Portfolio mode: several projects are written as one partitioned dataset.
+    if args.format == 'xlsx':
+        parser.error("portfolio exports are written as csv or parquet")
+    pcs = ProjectComponentStatus()
+    project_refs = list(args.project_refs)
+    if args.projects_file:
+        project_refs += read_project_refs(args.projects_file)
+    if args.filter:
+        project_refs += pcs.list_project_refs(args.filter)
+    project_refs = list(dict.fromkeys(project_refs))
+    if not project_refs:
+        parser.error("no projects to export")
+    pcs.export_portfolio(project_refs, args.format or 'parquet', args.processes)
@@ -1,5 +1,37 @@
 import os
+import sys
+import ssl
+import json
+import time
+import socket
+import argparse
+import http.client
+from datetime import datetime
 import requests
+from api_client import get_session, percentile, set_http_cache_enabled
+
+# Representative read endpoints probed by the benchmark mode. "benchmark_endpoints"
+# in config.json overrides this list.
+BENCHMARK_ENDPOINTS = [
+    '/health',
+    '/api/v2/projects?size=1',
+    '/api/v2/components?size=1',
+    '/api/v2/audit-logs?size=1',
+]
+PHASES = ['dns', 'connect', 'tls', 'ttfb', 'total']
+
+def read_config(config_path='config.json'):
+    try:
+        with open(config_path, 'r') as config_file:
+            config = json.load(config_file)
+            output_path = os.path.expanduser(config.get('output_path', '~/'))
+            os.makedirs(output_path, exist_ok=True)
+            return output_path, config.get('benchmark_endpoints', BENCHMARK_ENDPOINTS)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"Error reading config file: {e}. Defaulting to home directory.")
+        output_path = os.path.expanduser('~/')
+        os.makedirs(output_path, exist_ok=True)
+        return output_path, BENCHMARK_ENDPOINTS
 
 class Health:
     def __init__(self, instance_domain_path):
@@ -14,7 +46,7 @@ class Health:
         print(f"Checking health at URL: {endpoint_url}")
         try:
             # Set a timeout for the request
-            response = requests.get(endpoint_url, timeout=10)
+            response = get_session().get(endpoint_url, timeout=10)
             print(f"Received response: {response.status_code}")
             response.raise_for_status()
             return response.status_code == 200
@@ -33,7 +65,145 @@ class Health:
             print(f"File not found: {self.instance_domain_path}")
             return None
 
+class LatencyBenchmark:
+    # Times requests phase by phase on a raw http.client connection, which
+    # requests does not expose: DNS, TCP connect, TLS handshake, time to
+    # first byte (status line and headers) and total (body read). Cold probes
+    # open a new connection each time; warm probes reuse one keep-alive
+    # connection, so their dns/connect/tls are 0.
+    def __init__(self, host, api_token, timeout=30, port=443):
+        self.host = host
+        self.port = port
+        self.api_token = api_token
+        self.timeout = timeout
+        self.context = ssl.create_default_context()
+
+    def open_connection(self, timings):
+        start = time.perf_counter()
+        address = socket.getaddrinfo(self.host, self.port, type=socket.SOCK_STREAM)[0][4]
+        timings['dns'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sock = socket.create_connection(address[:2], timeout=self.timeout)
+        timings['connect'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        tls_sock = self.context.wrap_socket(sock, server_hostname=self.host)
+        timings['tls'] = time.perf_counter() - start
+
+        conn = http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout, context=self.context)
+        conn.sock = tls_sock
+        return conn
+
+    def probe(self, path, conn=None):
+        # Returns (timings in ms, status, connection to reuse or None).
+        timings = {'dns': 0.0, 'connect': 0.0, 'tls': 0.0}
+        start = time.perf_counter()
+        if conn is None:
+            conn = self.open_connection(timings)
+        headers = {'Accept': 'application/json', 'Accept-Encoding': 'gzip, deflate'}
+        if path != '/health':
+            headers['api-token'] = self.api_token
+        request_start = time.perf_counter()
+        conn.request('GET', path, headers=headers)
+        response = conn.getresponse()
+        timings['ttfb'] = time.perf_counter() - request_start
+        response.read()
+        timings['total'] = time.perf_counter() - start
+        reusable = not response.will_close
+        if not reusable:
+            conn.close()
+        return {phase: round(value * 1000, 2) for phase, value in timings.items()}, response.status, conn if reusable else None
+
+    def run(self, endpoints, repetitions):
+        results = []
+        for path in endpoints:
+            samples = {'cold': [], 'warm': []}
+            statuses = set()
+            errors = []
+            for _ in range(repetitions):
+                try:
+                    timings, status, conn = self.probe(path)
+                    samples['cold'].append(timings)
+                    statuses.add(status)
+                    if conn is None:
+                        conn = self.open_connection({})
+                    timings, status, conn = self.probe(path, conn)
+                    samples['warm'].append(timings)
+                    statuses.add(status)
+                    if conn is not None:
+                        conn.close()
+                except (OSError, http.client.HTTPException) as e:
+                    errors.append(str(e))
+            result = {'endpoint': path, 'statuses': sorted(statuses), 'errors': errors}
+            for mode, runs in samples.items():
+                result[mode] = {
+                    phase: {
+                        'p50_ms': percentile([run[phase] for run in runs], 50),
+                        'p95_ms': percentile([run[phase] for run in runs], 95),
+                        'max_ms': max((run[phase] for run in runs), default=None)
+                    } for phase in PHASES
+                }
+                result[mode]['samples'] = len(runs)
+            results.append(result)
+            self.print_result(result)
+        return results
+
+    def print_result(self, result):
+        print(f"\n{result['endpoint']}  status: {result['statuses'] or '-'}")
+        for mode in ('cold', 'warm'):
+            stats = result[mode]
+            line = ', '.join(f"{phase} {stats[phase]['p50_ms']}/{stats[phase]['p95_ms']}/{stats[phase]['max_ms']}"
+                             for phase in PHASES)
+            print(f"  {mode} ({stats['samples']} runs, p50/p95/max ms): {line}")
+        for error in result['errors']:
+            print(f"  error: {error}")
+
+def run_benchmark(repetitions, endpoints=None, instance_domain_path='~/ir/ir_instance_domain', api_token_path='~/ir/.ir_user_token'):
+    output_path, configured_endpoints = read_config()
+    endpoints = endpoints or configured_endpoints
+    instance_domain = Health(os.path.expanduser(instance_domain_path)).read_instance_domain()
+    if instance_domain is None:
+        sys.exit(1)
+    try:
+        with open(os.path.expanduser(api_token_path), 'r') as token_file:
+            api_token = token_file.read().strip()
+    except FileNotFoundError as e:
+        print(f"Error: {e}. Make sure the paths are correct.")
+        sys.exit(1)
+
+    host = f'{instance_domain}.iriusrisk.com'
+    print(f"Benchmarking {host}: {len(endpoints)} endpoints x {repetitions} cold + warm requests")
+    results = LatencyBenchmark(host, api_token).run(endpoints, repetitions)
+
+    report = {
+        'host': host,
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'repetitions': repetitions,
+        'endpoints': results
+    }
+    report_file = os.path.join(output_path, f"health_benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(report_file, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"\nBenchmark saved to {report_file}")
+    return report_file
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check IriusRisk API health, or benchmark request latency.")
+    parser.add_argument('--benchmark', type=int, metavar='N', help="probe each endpoint N times with cold and warm connections")
+    parser.add_argument('--endpoints', nargs='+', help="paths to probe instead of benchmark_endpoints / the defaults")
+    parser.add_argument('--no-cache', action='store_true', help="bypass the local HTTP response cache for this session")
+    args = parser.parse_args()
+    if args.no_cache:
+        set_http_cache_enabled(False)
+
+    if args.benchmark:
+        run_benchmark(args.benchmark, args.endpoints)
+        sys.exit(0)
+
+    from auth import Auth
+    from reception import Reception
+
     print("Starting script execution.")
     instance_file_path = os.path.expanduser("~/ir/ir_instance_domain")
     print(f"Instance file path: {instance_file_path}")
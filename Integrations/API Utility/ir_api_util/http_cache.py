@@ -0,0 +1,199 @@
+import os
+import re
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Local HTTP cache for library endpoints that rarely change.
+# Bodies are stored in SQLite together with their ETag / Last-Modified
+# validators; later GETs are revalidated with If-None-Match /
+# If-Modified-Since and a 304 is answered from the cache. Responses without
+# validators are reused until their max-age (or DEFAULT_TTL) runs out. The
+# total body size is capped and the least recently used entries are evicted.
+# A request with "Cache-Control: no-cache", or any request made inside a
+# revalidate() block, skips the TTL and is always checked with the server.
+
+DEFAULT_DB_NAME = 'http_cache.db'
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_TTL = 3600
+
+# Only read-only library endpoints are cached. /api/v2/libraries itself is left
+# out because its revisions drive library_cache.json invalidation.
+CACHEABLE_PATHS = [
+    re.compile(r'^/api/v2/components(/|$)'),
+    re.compile(r'^/api/v2/libraries/'),
+    re.compile(r'^/api/v2/trust-zones(/|$)'),
+    re.compile(r'^/api/v2/standards(/|$)'),
+]
+STORED_HEADERS = ['Content-Type', 'ETag', 'Last-Modified', 'Cache-Control']
+
+_state = threading.local()
+
+
+def is_cacheable(url):
+    path = requests.utils.urlparse(url).path
+    return any(pattern.match(path) for pattern in CACHEABLE_PATHS)
+
+
+class revalidate:
+    # Context manager that forces revalidation for the requests made on the
+    # current thread, for callers that cannot pass headers down (e.g. the
+    # library crawler going through the fetch_*.py functions).
+    def __enter__(self):
+        self.previous = getattr(_state, 'revalidate', False)
+        _state.revalidate = True
+        return self
+
+    def __exit__(self, *exc):
+        _state.revalidate = self.previous
+
+
+def must_revalidate(headers):
+    return getattr(_state, 'revalidate', False) or 'no-cache' in headers.get('Cache-Control', '')
+
+
+def max_age(cache_control):
+    match = re.search(r'max-age=(\d+)', cache_control or '')
+    return int(match.group(1)) if match else None
+
+
+class HttpCache:
+    def __init__(self, db_path, max_bytes=DEFAULT_MAX_BYTES, default_ttl=DEFAULT_TTL):
+        self.db_path = os.path.expanduser(db_path)
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS responses (
+                cache_key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires REAL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_responses_access ON responses (last_access);
+        ''')
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def key(self, url, headers):
+        # Responses differ per user and representation, so the token and
+        # Accept header are part of the key (the token only as a hash).
+        token = hashlib.sha256(headers.get('api-token', '').encode('utf-8')).hexdigest()
+        return hashlib.sha256(f"{url}\n{headers.get('Accept', '')}\n{token}".encode('utf-8')).hexdigest()
+
+    def get(self, cache_key):
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT headers, body, expires FROM responses WHERE cache_key = ?', (cache_key,)).fetchone()
+            if row is None:
+                return None
+            self.conn.execute('UPDATE responses SET last_access = ? WHERE cache_key = ?', (time.time(), cache_key))
+            self.conn.commit()
+        return {'headers': json.loads(row[0]), 'body': row[1], 'expires': row[2]}
+
+    def put(self, cache_key, url, response):
+        if 'no-store' in response.headers.get('Cache-Control', ''):
+            return
+        headers = {name: response.headers[name] for name in STORED_HEADERS if name in response.headers}
+        body = response.content
+        if len(body) > self.max_bytes:
+            return
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (cache_key, url, json.dumps(headers), sqlite3.Binary(body), len(body),
+                 self.expiry(headers), time.time()))
+            self.evict()
+            self.conn.commit()
+
+    def refresh(self, cache_key, response):
+        # A 304 may carry new validators or a new max-age.
+        entry = self.get(cache_key)
+        if entry is None:
+            return None
+        headers = entry['headers']
+        for name in STORED_HEADERS:
+            if name in response.headers:
+                headers[name] = response.headers[name]
+        entry['expires'] = self.expiry(headers)
+        with self.lock:
+            self.conn.execute('UPDATE responses SET headers = ?, expires = ? WHERE cache_key = ?',
+                              (json.dumps(headers), entry['expires'], cache_key))
+            self.conn.commit()
+        return entry
+
+    def expiry(self, headers):
+        # Entries with validators are always revalidated; others live for
+        # max-age seconds, or default_ttl when the server gives none.
+        if 'ETag' in headers or 'Last-Modified' in headers:
+            return None
+        age = max_age(headers.get('Cache-Control'))
+        return time.time() + (age if age is not None else self.default_ttl)
+
+    def evict(self):
+        # Drop least recently used entries until the cache fits max_bytes.
+        total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        cursor = self.conn.execute('SELECT cache_key, size FROM responses ORDER BY last_access')
+        stale = []
+        for cache_key, size in cursor:
+            if total <= self.max_bytes:
+                break
+            stale.append((cache_key,))
+            total -= size
+        self.conn.executemany('DELETE FROM responses WHERE cache_key = ?', stale)
+
+
+def cached_response(entry, url):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = entry['body']
+    response.headers = CaseInsensitiveDict(entry['headers'])
+    response.url = url
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.from_cache = True
+    return response
+
+
+class CachingSession(requests.Session):
+    # requests.Session that answers GETs on cacheable endpoints through an
+    # HttpCache. With cache set to None it behaves like a plain Session.
+    cache = None
+
+    def request(self, method, url, params=None, headers=None, **kwargs):
+        if self.cache is None or method.upper() != 'GET' or not is_cacheable(url):
+            return super().request(method, url, params=params, headers=headers, **kwargs)
+
+        full_url = requests.Request('GET', url, params=params).prepare().url
+        headers = dict(headers or {})
+        cache_key = self.cache.key(full_url, headers)
+        entry = self.cache.get(cache_key)
+        if entry is not None:
+            fresh = entry['expires'] is not None and entry['expires'] > time.time()
+            if fresh and not must_revalidate(headers):
+                return cached_response(entry, full_url)
+            if 'ETag' in entry['headers']:
+                headers['If-None-Match'] = entry['headers']['ETag']
+            if 'Last-Modified' in entry['headers']:
+                headers['If-Modified-Since'] = entry['headers']['Last-Modified']
+
+        response = super().request(method, full_url, headers=headers, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            entry = self.cache.refresh(cache_key, response) or entry
+            return cached_response(entry, full_url)
+        if response.status_code == 200:
+            self.cache.put(cache_key, full_url, response)
+        return response
@@ -0,0 +1,74 @@
+import os
+import json
+import threading
+
+# On-disk cache of the library hierarchy used by the STRIDE policy generators.
+# Risk pattern -> use cases and use case -> threats are stored together with
+# the id and revision of the library they came from. An entry is only served
+# while that library still has the same revision, so editing or re-importing
+# a library invalidates exactly the entries that came from it.
+
+DEFAULT_CACHE_NAME = 'library_cache.json'
+CACHE_VERSION = 2  # 2: use case entries are keyed by 'library_id/use_case_id'
+
+
+def library_id_of(risk_pattern):
+    return (risk_pattern.get('library') or {}).get('id')
+
+
+class LibraryCache:
+    def __init__(self, cache_path, library_revisions):
+        self.cache_path = os.path.expanduser(cache_path)
+        self.revisions = library_revisions
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.data = self.load()
+
+    def load(self):
+        empty = {'version': CACHE_VERSION, 'risk_patterns': {}, 'use_cases': {}}
+        try:
+            with open(self.cache_path, 'r') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return empty
+        if data.get('version') != CACHE_VERSION:
+            return empty
+        # Drop every entry whose library has since changed revision or gone away.
+        for kind in ('risk_patterns', 'use_cases'):
+            entries = data.get(kind, {})
+            data[kind] = {key: entry for key, entry in entries.items() if self.is_current(entry)}
+            if len(data[kind]) != len(entries):
+                self.dirty = True
+        return data
+
+    def is_current(self, entry):
+        library_id = entry.get('library_id')
+        return library_id in self.revisions and self.revisions[library_id] == entry.get('revision')
+
+    def get(self, kind, key):
+        entry = self.data[kind].get(key)
+        if entry is not None and self.is_current(entry):
+            return entry['items']
+        return None
+
+    def put(self, kind, key, library_id, items):
+        if library_id not in self.revisions:
+            return  # Without a revision there is nothing to invalidate against.
+        with self.lock:
+            self.data[kind][key] = {
+                'library_id': library_id,
+                'revision': self.revisions[library_id],
+                'items': items
+            }
+            self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+        tmp_path = f"{self.cache_path}.part"
+        with self.lock:
+            with open(tmp_path, 'w') as f:
+                json.dump(self.data, f)
+            os.replace(tmp_path, self.cache_path)
+            self.dirty = False
@@ -0,0 +1,174 @@
+import os
+from api_client import ordered_map, read_max_workers, set_http_cache_enabled
+from fetch_components import read_config, read_credentials, get_components, iter_components
+from fetch_components_categories import get_component_categories
+from fetch_trust_zones import fetch_trust_zones
+from fetch_component_risk_patterns import get_component_risk_patterns
+from fetch_risk_pattern_use_cases import get_risk_pattern_use_cases
+from fetch_use_case_threats import get_use_case_threats
+from fetch_libraries import fetch_libraries
+from library_cache import LibraryCache, DEFAULT_CACHE_NAME, library_id_of
+from http_cache import revalidate
+
+# In-process crawler over the library hierarchy
+# (component -> risk patterns -> use cases -> threats).
+# Uses the same fetch logic as the fetch_*.py scripts but returns Python
+# objects directly and fetches each level concurrently on the shared session.
+# With a LibraryCache, use cases and threats are read from disk for every
+# library whose revision has not changed since the previous run.
+# A failed page raises LibraryFetchError rather than returning the items read
+# so far, so an incomplete list never reaches a policy or library_cache.json.
+
+
+class LibraryFetchError(Exception):
+    pass
+
+
+class LibraryCrawler:
+    def __init__(self, api_token, instance_domain, page_size=2000, max_workers=None, cache=None):
+        self.api_token = api_token
+        self.instance_domain = instance_domain
+        self.page_size = page_size
+        self.max_workers = max_workers or read_max_workers()
+        self.cache = cache
+
+    def get_trust_zones(self):
+        return fetch_trust_zones(self.api_token, self.instance_domain, self.page_size)
+
+    def get_components(self, category_name=None):
+        return get_components(self.page_size, self.api_token, self.instance_domain, category_name)
+
+    def iter_components(self, category_name=None):
+        return iter_components(self.page_size, self.api_token, self.instance_domain, category_name)
+
+    def get_component_categories(self):
+        return get_component_categories(self.page_size, self.api_token, self.instance_domain)
+
+    def fetch_all(self, fetch, what, item_id):
+        try:
+            return fetch(item_id, self.page_size, self.api_token, self.instance_domain, verbose=False, raise_errors=True)
+        except Exception as e:
+            raise LibraryFetchError(f"Could not fetch the {what} of {item_id}: {e}") from e
+
+    def get_risk_patterns(self, component_id):
+        return self.fetch_all(get_component_risk_patterns, 'risk patterns', component_id)
+
+    def get_use_cases(self, risk_pattern_id):
+        return self.fetch_all(get_risk_pattern_use_cases, 'use cases', risk_pattern_id)
+
+    def get_threats(self, use_case_id):
+        return self.fetch_all(get_use_case_threats, 'threats', use_case_id)
+
+    def get_library_revisions(self):
+        libraries = fetch_libraries(self.api_token, self.instance_domain, self.page_size)
+        return {lib['id']: lib.get('revision') for lib in libraries if 'id' in lib}
+
+    def cached(self, kind, key, library_id, fetch):
+        # Serve from the cache while the owning library keeps its revision,
+        # otherwise fetch live and remember only the fields the policies use.
+        # A miss means the library is new or changed, so the HTTP cache must
+        # not answer it from a TTL entry stored under the old revision. A
+        # failed fetch raises before anything is put in the cache.
+        if self.cache is None:
+            return fetch()
+        items = self.cache.get(kind, key)
+        if items is None:
+            with revalidate():
+                fetched = fetch()
+            items = [{k: item[k] for k in ('id', 'name', 'referenceId') if k in item} for item in fetched]
+            self.cache.put(kind, key, library_id, items)
+        return items
+
+    def map_unique(self, func, items):
+        # Fetch once per distinct id (risk patterns and use cases are shared
+        # between components) and return {id: result}. items may be a
+        # generator; fetching starts as soon as the first item arrives.
+        seen = set()
+
+        def distinct():
+            for item in items:
+                if item['id'] not in seen:
+                    seen.add(item['id'])
+                    yield item
+
+        def fetch(item):
+            return item['id'], func(item)
+
+        return dict(ordered_map(fetch, distinct(), self.max_workers))
+
+    def build_threat_index(self, components, use_case_names, verbose=True):
+        # Crawls every component once and returns
+        # {component id: {use case name: set of threat referenceIds}} for the
+        # use cases whose name is in use_case_names. Risk patterns and use
+        # cases shared between components are only fetched once.
+        risk_patterns_by_component = self.map_unique(lambda c: self.get_risk_patterns(c['id']), components)
+        risk_patterns = [rp for patterns in risk_patterns_by_component.values() for rp in patterns]
+
+        def fetch_use_cases(rp):
+            return self.cached('risk_patterns', rp['id'], library_id_of(rp), lambda: self.get_use_cases(rp['id']))
+
+        try:
+            use_cases_by_rp = self.map_unique(fetch_use_cases, risk_patterns)
+
+            # A use case can be reached from risk patterns of several libraries;
+            # its threats are cached once per (library, use case) so that each
+            # copy is invalidated by the revision of the library it came from.
+            use_cases = []
+            rp_library = {rp['id']: library_id_of(rp) for rp in risk_patterns}
+            for rp_id, rp_use_cases in use_cases_by_rp.items():
+                for uc in rp_use_cases:
+                    if uc['name'] in use_case_names:
+                        if verbose:
+                            print(f"   ↳ STRIDE Use Case: {uc['name']}")
+                        use_cases.append({'id': (rp_library[rp_id], uc['id'])})
+
+            def fetch_threats(item):
+                library_id, uc_id = item['id']
+                return self.cached('use_cases', f"{library_id}/{uc_id}", library_id, lambda: self.get_threats(uc_id))
+
+            threats_by_uc = self.map_unique(fetch_threats, use_cases)
+        finally:
+            # Keep the complete entries fetched so far even if a later one failed
+            if self.cache is not None:
+                self.cache.save()
+
+        index = {}
+        for component_id, patterns in risk_patterns_by_component.items():
+            by_name = index.setdefault(component_id, {})
+            for rp in patterns:
+                for uc in use_cases_by_rp[rp['id']]:
+                    if uc['name'] in use_case_names:
+                        threat_ids = by_name.setdefault(uc['name'], set())
+                        threats = threats_by_uc[(library_id_of(rp), uc['id'])]
+                        threat_ids.update(t['referenceId'] for t in threats if 'referenceId' in t)
+        return index
+
+    def collect_threat_ids(self, components, use_case_names):
+        # Returns the referenceIds of every threat reachable from the given
+        # components through use cases whose name is in use_case_names.
+        # components may be a generator (see iter_components).
+        index = self.build_threat_index(components, use_case_names)
+        threat_ids = set()
+        for by_name in index.values():
+            for name in use_case_names:
+                threat_ids.update(by_name.get(name, ()))
+        return threat_ids
+
+
+def threat_ids_for(index, components, use_case_names):
+    threat_ids = set()
+    for component in components:
+        by_name = index.get(component['id'], {})
+        for name in use_case_names:
+            threat_ids.update(by_name.get(name, ()))
+    return threat_ids
+
+
+def create_crawler(max_workers=None, use_cache=True):
+    output_path, page_size = read_config()
+    api_token, instance_domain = read_credentials()
+    set_http_cache_enabled(use_cache)
+    crawler = LibraryCrawler(api_token, instance_domain, page_size, max_workers)
+    if use_cache:
+        crawler.cache = LibraryCache(os.path.join(output_path, DEFAULT_CACHE_NAME), crawler.get_library_revisions())
+    return crawler
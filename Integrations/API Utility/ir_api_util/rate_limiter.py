@@ -0,0 +1,80 @@
+import time
+import threading
+from email.utils import parsedate_to_datetime
+
+# Adaptive token bucket shared by every thread of a process.
+# Requests take a token before they are sent; the bucket refills at the
+# current rate. A 429/503 halves the rate and pauses every caller for the
+# Retry-After delay (without one, a pause that doubles with each consecutive
+# throttle); each run of healthy responses raises the rate again,
+# up to the configured max_rps.
+
+DEFAULT_MAX_RPS = 20.0
+MIN_RPS = 0.2
+THROTTLE_STATUS_CODES = (429, 503)
+BACKOFF_FACTOR = 0.5
+RAMP_UP_STEP = 0.1  # fraction of max_rate regained per healthy run
+RAMP_UP_AFTER = 10  # consecutive healthy responses before ramping up
+THROTTLE_PAUSE = 1.0  # pause after a 429/503 without Retry-After, doubled per consecutive one
+MAX_THROTTLE_PAUSE = 60.0
+
+
+def parse_retry_after(value):
+    # Retry-After is either a number of seconds or an HTTP date.
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class AdaptiveRateLimiter:
+    def __init__(self, rate=DEFAULT_MAX_RPS, max_rate=None, min_rate=MIN_RPS, burst=None):
+        self.max_rate = float(max_rate or rate)
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.rate = min(max(float(rate), self.min_rate), self.max_rate)
+        self.burst = float(burst or max(1.0, self.rate))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.healthy = 0
+        self.throttled = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                wait = self.paused_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def record(self, status_code, retry_after=None):
+        with self.lock:
+            if status_code in THROTTLE_STATUS_CODES:
+                self.healthy = 0
+                self.throttled += 1
+                self.rate = max(self.min_rate, self.rate * BACKOFF_FACTOR)
+                delay = parse_retry_after(retry_after)
+                if delay is None:
+                    backoff = THROTTLE_PAUSE * 2 ** (self.throttled - 1)
+                    delay = max(1 / self.rate, min(MAX_THROTTLE_PAUSE, backoff))
+                self.paused_until = max(self.paused_until, time.monotonic() + delay)
+                self.tokens = min(self.tokens, 0.0)
+            elif status_code < 500:
+                self.throttled = 0
+                self.healthy += 1
+                if self.healthy >= RAMP_UP_AFTER and self.rate < self.max_rate:
+                    self.healthy = 0
+                    self.rate = min(self.max_rate, self.rate + self.max_rate * RAMP_UP_STEP)
@@ -1,5 +1,6 @@
 import os
-import subprocess
+import sys
+import importlib
 
 class Reception:
     def __init__(self):
@@ -19,19 +20,24 @@ class Reception:
         for item in self.menu:
             print(item)
 
-    def execute_script(self, script_path, args):
-        script_absolute_path = os.path.expanduser(script_path)
+    def run_main(self, module_name, argv=None, args=None):
+        # Imports the report module on first use and calls its main() in this
+        # process, so pandas and friends load only when a report needs them and
+        # later menu actions reuse the warm HTTP session and module caches.
+        # argv is what the script would have seen on its command line; args
+        # are passed to main() directly.
+        saved_argv = sys.argv
         try:
-            subprocess.run(['python3', script_absolute_path] + args, check=True)
-        except subprocess.CalledProcessError as e:
-            print(f"Error executing script: {script_absolute_path}, {e}")
-
-    def execute_script_noArgs(self, script_path):
-        script_absolute_path = os.path.expanduser(script_path)
-        try:
-            subprocess.run(['python3', script_absolute_path], check=True)
-        except subprocess.CalledProcessError as e:
-            print(f"Error executing script: {script_absolute_path}, {e}")
+            module = importlib.import_module(module_name)
+            sys.argv = [module.__file__] + list(argv or [])
+            module.main(*(args or []))
+        except SystemExit as e:
+            if e.code not in (None, 0):
+                print(f"{module_name} exited: {e.code}")
+        except Exception as e:
+            print(f"Error running {module_name}: {e}")
+        finally:
+            sys.argv = saved_argv
 
     def business_unit_reports_menu(self):
         sub_menu = ["Business Unit Reports:", "",
@@ -48,9 +54,9 @@ class Reception:
         if choice == "1":
             business_unit_name_or_uuid = input("Enter the Business Unit name or UUID: ")
             print("")
-            self.execute_script('~/ir_api_util/singleBusinessUnit_ByProjects_ByUsers.py', [business_unit_name_or_uuid])
+            self.run_main('singleBusinessUnit_ByProjects_ByUsers', [business_unit_name_or_uuid])
         elif choice == "2":
-            self.execute_script_noArgs('~/ir_api_util/allBusinessUnits_ByProjects_ByUsers.py')
+            self.run_main('allBusinessUnits_ByProjects_ByUsers')
         elif choice == "0":
             return
         else:
@@ -70,7 +76,7 @@ class Reception:
         print("")
 
         if choice == "1":
-            self.execute_script_noArgs('~/ir_api_util/apiChecker.py')
+            self.run_main('apiChecker')
         elif choice == "2":
             name = input("Enter a Friendly name for the query (v1 GET Project Details): ")
             print("")
@@ -85,7 +91,7 @@ class Reception:
             if method not in valid_methods:
                 print(f"Invalid HTTP method: {method}. Please enter one of the following: {', '.join(valid_methods)}")
             else:
-                self.execute_script('~/ir_api_util/addEndPoint.py', [name, method, url, sample_output_file])
+                self.run_main('addEndPoint', [name, method, url, sample_output_file])
         elif choice == "0":
             return
         else:
@@ -96,6 +102,7 @@ class Reception:
         sub_menu = ["Create Trust Zone Policy:", "",
                     "1. TZ Policy by Component",
                     "2. TZ Policy by Component Category",
+                    "3. TZ Policies from a Matrix File (CSV/YAML)",
                     "0. Back to Main Menu"]
         for item in sub_menu:
             print(item)
@@ -105,9 +112,13 @@ class Reception:
         print("")
 
         if choice == "1":
-            self.execute_script_noArgs('~/ir_api_util/createStridePolicyByComponent.py')
+            self.run_main('createStridePolicyByComponent')
         elif choice == "2":
-            self.execute_script_noArgs('~/ir_api_util/createStridePolicyByComponentCategory.py')
+            self.run_main('createStridePolicyByComponentCategory')
+        elif choice == "3":
+            matrix_path = input("Enter the path to the policy matrix file: ")
+            print("")
+            self.run_main('createStridePolicyBatch', [os.path.expanduser(matrix_path)])
         elif choice == "0":
             return
         else:
@@ -121,23 +132,23 @@ class Reception:
             choice = input("Please make a selection: ")
             print("")
             if choice == "1":
-                self.execute_script_noArgs('~/ir_api_util/getProjectList.py')
+                self.run_main('getProjectList')
             elif choice == "2":
                 project_id = input("Enter the target Project ID: ")
                 print("")
-                self.execute_script('~/ir_api_util/getProject_CM_Status.py', [project_id])
+                self.run_main('getProject_CM_Status', args=[project_id])
             elif choice == "3":
                 project_id = input("Enter the target Project ID: ")
                 print("")
-                self.execute_script('~/ir_api_util/getProject_Threat_Hierarchy_Data.py', [project_id])
+                self.run_main('getProject_Threat_Hierarchy_Data', args=[project_id])
             elif choice == "8":
                 days = input("Enter the number of days for the User Access Report: ")
                 print("")
-                self.execute_script('~/ir_api_util/userAccessReport.py', [days])
+                self.run_main('userAccessReport', [days])
             elif choice == "9":
                 self.business_unit_reports_menu()
             elif choice == "10":
-                self.execute_script_noArgs('~/ir_api_util/auditLogReport.py')
+                self.run_main('auditLogReport')
             elif choice == "12":
                 self.api_query_checker_menu()
             elif choice == "13":
@@ -1,9 +1,9 @@
 import os
 import sys
 import requests
-import pandas as pd
 import json
 from datetime import datetime, timedelta
+from api_client import get_session
 
 def read_config(config_path='config.json'):
     try:
@@ -44,7 +44,7 @@ class BaseAPI:
             'api-token': self.api_token
         }
         try:
-            response = requests.get(url, headers=headers, params=params)
+            response = get_session().get(url, headers=headers, params=params)
             response.raise_for_status()
             return response.json()
         except requests.HTTPError as e:
@@ -69,6 +69,7 @@ class BusinessUnitReport(BaseAPI):
         return None
 
     def generate_business_unit_project_report(self, business_unit_name_or_uuid):
+        import pandas as pd
         business_unit_id = self.get_business_unit_id(business_unit_name_or_uuid)
         if business_unit_id is None:
             print(f"Business Unit '{business_unit_name_or_uuid}' not found.")
@@ -118,6 +119,7 @@ class BusinessUnitReport(BaseAPI):
             print("")
 
     def generate_business_unit_user_listing(self, business_unit_name_or_uuid):
+        import pandas as pd
         business_unit_id = self.get_business_unit_id(business_unit_name_or_uuid)
         if business_unit_id is None:
             print(f"Business Unit '{business_unit_name_or_uuid}' not found.")
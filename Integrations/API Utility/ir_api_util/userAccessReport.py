@@ -3,6 +3,8 @@ import sys
 import requests
 import json
 from datetime import datetime, timedelta
+from api_client import get_session, ordered_map, read_max_workers
+from audit_log_store import AuditLogStore, DEFAULT_DB_NAME
 
 def read_config(config_path='config.json'):
     try:
@@ -42,7 +44,7 @@ class BaseAPI:
             'api-token': self.api_token
         }
         try:
-            response = requests.get(url, headers=headers, params=params)
+            response = get_session().get(url, headers=headers, params=params)
             response.raise_for_status()
             return response.json()
         except requests.HTTPError as e:
@@ -53,43 +55,84 @@ class BaseAPI:
             return None
 
 class UserReport(BaseAPI):
-    def __init__(self, api_token_path='~/ir/.ir_user_token', instance_domain_path='~/ir/ir_instance_domain'):
+    def __init__(self, api_token_path='~/ir/.ir_user_token', instance_domain_path='~/ir/ir_instance_domain', store=None, max_workers=None):
         super().__init__(api_token_path, instance_domain_path)
         self.output_path = read_config()
+        self.page_size = 2000
+        self.max_workers = max_workers or read_max_workers()
+        # Optional AuditLogStore used to sync LOGIN_SUCCESS events incrementally.
+        self.store = store
 
     def get_active_and_inactive_users(self, days=30):
         active_users = self.get_active_users_within_days(days)
-        all_users_response = self.make_request('users')
+        if active_users is None:
+            print("Failed to fetch active users.")
+            return
 
-        if not all_users_response or '_embedded' not in all_users_response:
-            print("Failed to fetch users.")
+        try:
+            all_usernames = self.collect_usernames('users')
+        except RuntimeError as e:
+            print(f"Failed to fetch users. {e}")
             return
 
-        all_usernames = [user['username'] for user in all_users_response['_embedded']['items']]
-        active_users_set = set(active_users)
-        inactive_users = list(set(all_usernames) - active_users_set)
+        inactive_users = list(all_usernames - set(active_users))
 
         self.save_results(active_users, inactive_users, days)
 
-    def get_active_users_within_days(self, days):
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
-        start_date_str = start_date.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'  # Trim microseconds
-
-        filter_value = f"'timestamp'>='{start_date_str}':AND:'eventType'='LOGIN_SUCCESS'"
+    def iter_pages(self, endpoint, params=None):
+        # Page 0 reports totalPages; the remaining pages are fetched concurrently
+        # and yielded in order. A failed page raises RuntimeError rather than
+        # silently truncating the result.
+        params = dict(params or {}, size=self.page_size)
+        first_page = self.make_request(endpoint, params=dict(params, page=0))
+        if not first_page or 'page' not in first_page:
+            raise RuntimeError(f"Failed to fetch page 0 of '{endpoint}'")
+        yield first_page.get('_embedded', {}).get('items', [])
+
+        def fetch(page):
+            return page, self.make_request(endpoint, params=dict(params, page=page))
+
+        total_pages = first_page['page'].get('totalPages', 1)
+        for page, response in ordered_map(fetch, range(1, total_pages), self.max_workers):
+            if not response or 'page' not in response:
+                raise RuntimeError(f"Failed to fetch page {page} of '{endpoint}'")
+            yield response.get('_embedded', {}).get('items', [])
+
+    def collect_usernames(self, endpoint, params=None):
+        # Only the username set is kept; each page is dropped once consumed.
+        usernames = set()
+        for items in self.iter_pages(endpoint, params):
+            usernames.update(item['username'] for item in items if item.get('username'))
+        return usernames
+
+    def fetch_login_pages(self, event_type, since):
+        # Used by AuditLogStore.sync: pages through every event newer than the
+        # watermark and raises on a failed page so the watermark never skips one.
         params = {
-            'filter': filter_value,
+            'filter': f"'timestamp'>='{since}':AND:'eventType'='{event_type}'",
             'sort': 'timestamp'
         }
+        return self.iter_pages('audit-logs', params)
 
-        response = self.make_request('audit-logs', params=params)
-
-        if response and '_embedded' in response:
-            active_users = [item['username'] for item in response['_embedded']['items']]
-            return list(set(active_users))
-        else:
-            print("No active users found or error encountered.")
-            return []
+    def get_active_users_within_days(self, days):
+        try:
+            if self.store is not None:
+                self.store.sync('LOGIN_SUCCESS', days, self.fetch_login_pages)
+                return list(self.store.usernames('LOGIN_SUCCESS', days))
+
+            end_date = datetime.now()
+            start_date = end_date - timedelta(days=days)
+            start_date_str = start_date.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'  # Trim microseconds
+
+            filter_value = f"'timestamp'>='{start_date_str}':AND:'eventType'='LOGIN_SUCCESS'"
+            params = {
+                'filter': filter_value,
+                'sort': 'timestamp'
+            }
+            return list(self.collect_usernames('audit-logs', params))
+        except RuntimeError as e:
+            print(f"No active users found or error encountered. {e}")
+            return None
 
     def save_results(self, active_users, inactive_users, days):
         result = {
@@ -103,13 +146,20 @@ class UserReport(BaseAPI):
         print(f"Report saved to {output_file}")
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python3 userAccessReport.py <days>")
+    if len(sys.argv) < 2 or (len(sys.argv) == 3 and sys.argv[2] != '--incremental') or len(sys.argv) > 3:
+        print("Usage: python3 userAccessReport.py <days> [--incremental]")
         sys.exit(1)
 
     days = int(sys.argv[1])
-    user_report = UserReport()
-    user_report.get_active_and_inactive_users(days)
+    store = None
+    if len(sys.argv) == 3:
+        store = AuditLogStore(os.path.join(read_config(), DEFAULT_DB_NAME))
+    user_report = UserReport(store=store)
+    try:
+        user_report.get_active_and_inactive_users(days)
+    finally:
+        if store is not None:
+            store.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the streamed audit log writers
+"""
+
+import unittest
+import csv
+import json
+import os
+import sys
+import tempfile
+import shutil
+
+# Add ir_api_util directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'ir_api_util'))
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+# Pages of different event types: keys appear, disappear and change type
+PAGES = [
+    [{'id': 1, 'eventType': 'LOGIN_SUCCESS', 'user': 'alice', 'details': None}],
+    [{'id': 2, 'eventType': 'PROJECT_UPDATED', 'user': 'bob', 'details': {'project': 'p-1'}, 'projectId': 'p-1'}],
+    [{'id': '3', 'eventType': 'USER_DISABLED', 'target': 'carol'}],
+]
+
+
+class TestStreamedLogWriters(unittest.TestCase):
+    """Unit tests for CsvLogWriter and ParquetLogWriter"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Clean up test environment"""
+        shutil.rmtree(self.test_dir)
+
+    def write(self, writer_class):
+        file_path = os.path.join(self.test_dir, f"logs.{writer_class.extension}")
+        writer = writer_class(file_path)
+        for page in PAGES:
+            writer.write_rows(page)
+        writer.close()
+        self.assertEqual(os.listdir(self.test_dir), [os.path.basename(file_path)])
+        return file_path
+
+    def test_csv_keeps_keys_from_later_pages(self):
+        """Test that CSV columns are the union of every page's keys"""
+        from auditLogReport import CsvLogWriter
+
+        with open(self.write(CsvLogWriter), newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            rows = list(reader)
+
+        self.assertEqual(reader.fieldnames, ['id', 'eventType', 'user', 'details', 'projectId', 'target'])
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(json.loads(rows[1]['details']), {'project': 'p-1'})
+        self.assertEqual(rows[1]['projectId'], 'p-1')
+        self.assertEqual(rows[2]['target'], 'carol')
+        self.assertEqual(rows[0]['target'], '')
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_parquet_keeps_keys_and_mixed_types(self):
+        """Test that Parquet keeps later keys and survives type changes between pages"""
+        import pyarrow.parquet as pq
+        from auditLogReport import ParquetLogWriter
+
+        table = pq.read_table(self.write(ParquetLogWriter))
+        rows = table.to_pylist()
+
+        self.assertEqual(table.column_names, ['id', 'eventType', 'user', 'details', 'projectId', 'target'])
+        self.assertEqual([row['id'] for row in rows], ['1', '2', '3'])
+        self.assertEqual(rows[1]['details'], {'project': 'p-1'})
+        self.assertEqual(rows[2]['target'], 'carol')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
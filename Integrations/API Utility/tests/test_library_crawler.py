@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the library crawler and its on-disk library cache
+"""
+
+import unittest
+import json
+import os
+import sys
+import tempfile
+import shutil
+import requests
+from unittest.mock import patch, MagicMock
+
+# Add ir_api_util directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'ir_api_util'))
+
+
+def page_response(items, total_pages):
+    response = MagicMock(status_code=200)
+    response.json.return_value = {'_embedded': {'items': items}, 'page': {'totalPages': total_pages}}
+    return response
+
+
+def failed_response(status_code=500):
+    response = MagicMock(status_code=status_code, text='Internal Server Error')
+    response.raise_for_status.side_effect = requests.HTTPError(f"{status_code} Server Error")
+    return response
+
+
+class TestLibraryCrawlerCache(unittest.TestCase):
+    """Unit tests for LibraryCrawler.cached"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.test_dir = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.test_dir, 'library_cache.json')
+
+    def tearDown(self):
+        """Clean up test environment"""
+        shutil.rmtree(self.test_dir)
+
+    def crawler(self):
+        from library_crawler import LibraryCrawler
+        from library_cache import LibraryCache
+
+        cache = LibraryCache(self.cache_path, {'lib-1': 3})
+        return LibraryCrawler('token', 'test', page_size=1, max_workers=1, cache=cache)
+
+    def test_failed_page_is_not_cached(self):
+        """Test that threats are not cached when a later page fails"""
+        from library_crawler import LibraryFetchError
+
+        crawler = self.crawler()
+        session = MagicMock()
+        session.get.side_effect = [page_response([{'id': 't-1', 'referenceId': 'T1'}], 2), failed_response()]
+
+        with patch('fetch_use_case_threats.get_session', return_value=session):
+            with self.assertRaises(LibraryFetchError):
+                crawler.cached('use_cases', 'lib-1/uc-1', 'lib-1', lambda: crawler.get_threats('uc-1'))
+
+        self.assertIsNone(crawler.cache.get('use_cases', 'lib-1/uc-1'))
+        crawler.cache.save()
+        if os.path.exists(self.cache_path):
+            with open(self.cache_path) as f:
+                self.assertNotIn('lib-1/uc-1', json.load(f)['use_cases'])
+
+    def test_complete_fetch_is_cached(self):
+        """Test that threats are cached once every page has been read"""
+        crawler = self.crawler()
+        session = MagicMock()
+        session.get.side_effect = [page_response([{'id': 't-1', 'referenceId': 'T1'}], 2),
+                                   page_response([{'id': 't-2', 'referenceId': 'T2'}], 2)]
+
+        with patch('fetch_use_case_threats.get_session', return_value=session):
+            crawler.cached('use_cases', 'lib-1/uc-1', 'lib-1', lambda: crawler.get_threats('uc-1'))
+
+        self.assertEqual([t['referenceId'] for t in crawler.cache.get('use_cases', 'lib-1/uc-1')], ['T1', 'T2'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
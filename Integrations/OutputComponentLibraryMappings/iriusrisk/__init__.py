@@ -1,4 +1,5 @@
 import iriusrisk.commandline
+import iriusrisk.ratelimit
 import logging
 import urllib.parse
 import requests
@@ -136,6 +137,8 @@ def call_endpoint(path, verb, params=None, headers=None, body=None):
 
     proxy = _get_proxy_parameters()
 
+    limiter = iriusrisk.ratelimit.get_rate_limiter(config.max_rps)
+    limiter.acquire()
     if not body:
         r = requests.request(verb, url, params=params, headers=headers, proxies=proxy)
     elif isinstance(body, Multipart): 
@@ -149,6 +152,7 @@ def call_endpoint(path, verb, params=None, headers=None, body=None):
     else:
         r = requests.request(verb, url, params=params, headers=headers, data=body, proxies=proxy)
 
+    limiter.record(r)
     return r
 
 
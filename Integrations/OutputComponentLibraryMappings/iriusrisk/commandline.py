@@ -67,6 +67,7 @@ def initialize():
     _parsed_args.subdomain = _get_config_value(config, _parsed_args.subdomain, "subdomain", None)
     _parsed_args.proxy_port = _get_config_value(config, _parsed_args.proxy_port, "proxy_port", None)
     _parsed_args.proxy_url = _get_config_value(config, _parsed_args.proxy_url, "proxy_url", None)
+    _parsed_args.max_rps = float(_get_config_value(config, _parsed_args.max_rps, "max_rps", 5.0))
 
     if not _parsed_args.key or not (_parsed_args.subdomain or _parsed_args.domain):
         raise Exception("API key and domain or subdomain need to be specified on the command line (use --help)")
@@ -118,6 +119,7 @@ and is only relevant when using --domain."""
         _command_line_parser.add_argument("-q", "--quiet", help="Only print error messages to stdout", action="store_true")
         _command_line_parser.add_argument("--proxy_port", help="The proxy server port; required if --proxy_url specified", type=int, metavar="NUM")
         _command_line_parser.add_argument("--proxy_url", help="The proxy server URL, if present", metavar="URL")
+        _command_line_parser.add_argument("--max_rps", help="Maximum API requests per second; lowered automatically while the server throttles. Default: 5", type=float, metavar="NUM")
 
     return _command_line_parser
 
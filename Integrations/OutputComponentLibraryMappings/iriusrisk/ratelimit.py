@@ -0,0 +1,103 @@
+"""Adaptive, thread-safe rate limiting for calls to the IriusRisk API.
+
+Every call made through #iriusrisk.call_endpoint() first takes a token from a
+token bucket refilled at the current requests-per-second rate, and then
+reports the response status back. A 429 or 503 halves the rate and pauses all
+callers for the Retry-After delay the server asked for (without one, for 10
+seconds, doubling up to 160 for each consecutive throttle); a run of healthy
+responses raises the rate again, up to the configured maximum (--max_rps or
+max_rps in iriusrisk.ini)."""
+import logging
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+__all__ = ["RateLimiter", "get_rate_limiter", "THROTTLE_STATUS_CODES"]
+
+_log = logging.getLogger(__name__)
+
+DEFAULT_MAX_RPS = 5.0
+MIN_RPS = 0.2
+THROTTLE_STATUS_CODES = (429, 503)
+BACKOFF_FACTOR = 0.5
+RAMP_UP_STEP = 0.1
+RAMP_UP_AFTER = 10
+THROTTLE_PAUSE = 10.0  # pause after a 429/503 without Retry-After, doubled per consecutive one
+MAX_THROTTLE_PAUSE = 160.0
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+"""Converts a Retry-After header (seconds or an HTTP date) to seconds. Returns
+None if the header is missing or cannot be read."""
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class RateLimiter:
+    def __init__(self, rate=DEFAULT_MAX_RPS, max_rate=None, min_rate=MIN_RPS):
+        self.max_rate = float(max_rate or rate)
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.rate = min(max(float(rate), self.min_rate), self.max_rate)
+        self.burst = max(1.0, self.rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.healthy = 0
+        self.throttled = 0
+        self.lock = threading.Lock()
+
+    """Blocks until a request may be sent."""
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                wait = self.paused_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    """Adjusts the rate based on the response to the last request."""
+    def record(self, response):
+        with self.lock:
+            if response.status_code in THROTTLE_STATUS_CODES:
+                self.healthy = 0
+                self.throttled += 1
+                self.rate = max(self.min_rate, self.rate * BACKOFF_FACTOR)
+                delay = parse_retry_after(response.headers.get("Retry-After"))
+                if delay is None:
+                    backoff = THROTTLE_PAUSE * 2 ** (self.throttled - 1)
+                    delay = max(1 / self.rate, min(MAX_THROTTLE_PAUSE, backoff))
+                self.paused_until = max(self.paused_until, time.monotonic() + delay)
+                self.tokens = min(self.tokens, 0.0)
+                _log.info(f"Throttled ({response.status_code}); pausing {delay:.1f}s, rate now {self.rate:.2f} requests/second")
+            elif response.status_code < 500:
+                self.throttled = 0
+                self.healthy += 1
+                if self.healthy >= RAMP_UP_AFTER and self.rate < self.max_rate:
+                    self.healthy = 0
+                    self.rate = min(self.max_rate, self.rate + self.max_rate * RAMP_UP_STEP)
+
+
+"""Returns the limiter shared by all threads, creating it on first use."""
+def get_rate_limiter(max_rps=None):
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter(float(max_rps or DEFAULT_MAX_RPS))
+    return _limiter
@@ -12,8 +12,8 @@ mapping when attempting to change the status of countermeasures.
 """
 import iriusrisk.commandline
 from iriusrisk import *
+from iriusrisk.ratelimit import THROTTLE_STATUS_CODES
 import logging
-import time
 
 _log = logging.getLogger(__file__)
 
@@ -26,6 +26,8 @@ class RiskPattern:
 
 riskpattern_to_countermeasures = {}
 
+MAX_THROTTLED_ATTEMPTS = 5
+
 """This method checks the response status of an HTTP call. It 
 returns True if a new attempt (or initial attempt) at the call 
 should be made, False if the call was successful. The only 
@@ -33,26 +35,27 @@ response to return False is 200 (tho theoretically there are
 other responses that might justify a False--201, for instance).
 
 The only responses that return True are: no response (i.e., call
-has yet to be made) and 503. The 503 can be a temporary situation,
+has yet to be made), 429 and 503. These can be temporary situations,
 so the method allows for multiple attempts at the call before 
-failing.
+failing. The wait between attempts is left to the shared rate
+limiter, which slows down and honours Retry-After on throttling;
+without Retry-After it waits 10, 20, 40, 80 and 160 seconds.
 
-If a 503 fails too often, and for any other failure statuses,
+If a call is throttled too often, and for any other failure statuses,
 an exception is raised.
 """
 def failover(response, activity_message):
-    global wait_time
+    global attempts
     if response is None: 
-        wait_time = 10
+        attempts = 0
         return True
     
     if response.status_code == 200:
         return False
     
-    if response.status_code == 503 and wait_time <= 160:
-        _log.info(f"Got a bad gateway error while {activity_message}. Waiting {wait_time} seconds and trying again")
-        time.sleep(wait_time)
-        wait_time = wait_time * 2
+    if response.status_code in THROTTLE_STATUS_CODES and attempts < MAX_THROTTLED_ATTEMPTS:
+        attempts += 1
+        _log.info(f"Got a {response.status_code} while {activity_message}. Trying again (attempt {attempts + 1})")
         return True
     
     raise Exception(f"Error {activity_message}: {response.reason} ({response.status_code})")
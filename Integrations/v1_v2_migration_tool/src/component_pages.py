@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Paginated component collection shared by Phase 1 and Phase 2
+
+Instead of one huge size=200000 request, /components is read in pages of
+COMPONENT_PAGE_SIZE:
+1. The first page is fetched to learn totalPages / totalElements
+2. The remaining pages are fetched concurrently (a bounded window, in order)
+3. Pages are yielded as they arrive so callers can stream them to disk
+4. If the number of components received differs from totalElements,
+   IncompleteCollectionError is raised instead of returning a truncated list
+"""
+
+import os
+import json
+import textwrap
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from rate_limiter import limited_request
+
+COMPONENT_PAGE_SIZE = 2000
+DEFAULT_MAX_WORKERS = 8
+
+class IncompleteCollectionError(Exception):
+    """
+    Raised when fewer (or more) components arrive than the API reported
+    """
+
+def fetch_page(url, headers, params):
+    """
+    Fetch one page of a collection and return the decoded JSON
+    """
+    response = limited_request(lambda: requests.get(url, headers=headers, params=params, timeout=60))
+    response.raise_for_status()
+    return response.json()
+
+def page_items(data):
+    """
+    Return the items of a page, accepting both 'items' and 'component' keys
+    """
+    if isinstance(data, list):
+        return data
+    embedded = data.get('_embedded', {})
+    return embedded.get('items', embedded.get('component', []))
+
+def iter_component_pages(base_url, headers, filter_expr=None, page_size=COMPONENT_PAGE_SIZE,
+                         max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Yield the items of every /components page, in page order
+    """
+    url = f"{base_url}/components"
+    params = {'size': page_size}
+    if filter_expr:
+        params['filter'] = filter_expr
+
+    first = fetch_page(url, headers, {**params, 'page': 0})
+    items = page_items(first)
+    received = len(items)
+    yield items
+
+    page_info = first.get('page', {}) if isinstance(first, dict) else {}
+    total_pages = page_info.get('totalPages')
+    total_elements = page_info.get('totalElements')
+
+    if isinstance(total_pages, int):
+        print(f"📈 {total_elements} components in {total_pages} pages of {page_info.get('size', page_size)}")
+        # Keep at most max_workers pages in flight so memory stays bounded
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            window = deque()
+            for page in range(1, total_pages):
+                window.append(executor.submit(fetch_page, url, headers, {**params, 'page': page}))
+                if len(window) >= max_workers:
+                    items = page_items(window.popleft().result())
+                    received += len(items)
+                    yield items
+            while window:
+                items = page_items(window.popleft().result())
+                received += len(items)
+                yield items
+    else:
+        # No page metadata: follow the next links one page at a time
+        data, page = first, 0
+        while isinstance(data, dict) and 'next' in data.get('_links', {}) and items:
+            page += 1
+            data = fetch_page(url, headers, {**params, 'page': page})
+            items = page_items(data)
+            received += len(items)
+            yield items
+
+    if isinstance(total_elements, int) and received != total_elements:
+        raise IncompleteCollectionError(
+            f"received {received} components but the API reported {total_elements}; "
+            f"the catalogue may have changed during collection - please run this phase again")
+
+def write_json_array(items, filename):
+    """
+    Stream items to filename as a JSON array and return how many were written
+
+    Produces the same layout as json.dump(list, indent=2). The data goes to
+    <filename>.part first and only replaces filename once complete.
+    """
+    tmp_path = f"{filename}.part"
+    count = 0
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('[')
+            for item in items:
+                f.write(',\n' if count else '\n')
+                f.write(textwrap.indent(json.dumps(item, indent=2, ensure_ascii=False), '  '))
+                count += 1
+            f.write('\n]' if count else ']')
+        os.replace(tmp_path, filename)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return count
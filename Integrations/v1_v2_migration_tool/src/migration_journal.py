@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Append-only journal of risk pattern operations for Phase 4b and Phase 4 cleanup
+
+Every POST (transfer) and DELETE (remove) outcome is appended as one JSON line
+keyed by (v1 component referenceId, risk pattern id). Lines are flushed as they
+are written and fsync'd in batches. On restart the journal is replayed so that:
+1. Phase 4b skips risk patterns whose latest operation is a successful transfer
+2. Phase 4 cleanup skips risk patterns whose latest operation is a successful removal
+
+A cleanup therefore re-enables the transfer of the patterns it removed.
+"""
+
+import os
+import json
+import time
+import threading
+
+JOURNAL_FILE = 'migration_journal.jsonl'
+FSYNC_BATCH = 50
+
+class MigrationJournal:
+    """
+    Journal of the latest operation per (v1 component, risk pattern)
+
+    With path=None the journal only lives in memory.
+    """
+
+    def __init__(self, path=JOURNAL_FILE, fsync_batch=FSYNC_BATCH):
+        self.path = path
+        self.fsync_batch = max(1, fsync_batch)
+        self.latest = {}
+        self.unsynced = 0
+        self.lock = threading.Lock()
+        self.file = None
+        if path:
+            self.replay()
+            self.file = open(path, 'a', encoding='utf-8')
+            # A crash can leave a torn last line; start the next entry on a fresh line
+            if self.file.tell() > 0 and not self.ends_with_newline():
+                self.file.write('\n')
+
+    def replay(self):
+        """
+        Load the latest entry per key from an existing journal file
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn write from an interrupted run
+                    self.latest[(entry['v1_ref'], entry['risk_pattern_id'])] = entry
+        except FileNotFoundError:
+            pass
+
+    def ends_with_newline(self):
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def last(self, v1_ref, risk_pattern_id):
+        return self.latest.get((v1_ref, risk_pattern_id))
+
+    def is_done(self, op, v1_ref, risk_pattern_id):
+        """
+        True if the latest operation on this pair is a successful `op`
+        """
+        entry = self.last(v1_ref, risk_pattern_id)
+        return entry is not None and entry['op'] == op and entry['success']
+
+    def record(self, op, v1_ref, risk_pattern_id, success, error=None, **details):
+        """
+        Append one operation outcome
+        """
+        entry = {
+            'op': op,
+            'v1_ref': v1_ref,
+            'risk_pattern_id': risk_pattern_id,
+            'success': success,
+            'error': error,
+            'timestamp': time.time(),
+            **details
+        }
+        with self.lock:
+            self.latest[(v1_ref, risk_pattern_id)] = entry
+            if self.file is None:
+                return entry
+            self.file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self.file.flush()
+            self.unsynced += 1
+            if self.unsynced >= self.fsync_batch:
+                os.fsync(self.file.fileno())
+                self.unsynced = 0
+        return entry
+
+    def sync(self):
+        with self.lock:
+            if self.file is not None and self.unsynced:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                self.unsynced = 0
+
+    def close(self):
+        self.sync()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
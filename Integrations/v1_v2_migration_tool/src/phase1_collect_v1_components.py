@@ -4,13 +4,22 @@ Phase 1: Collect v1 deprecated components
 
 This script queries the API to collect all components that contain 'Deprecated' in their name
 and saves the id, referenceId, and name to v1_components.json
+
+Components are fetched in bounded pages (concurrently) and streamed to the
+output file; the run fails rather than saving a truncated list.
 """
 
 import requests
 import json
 import os
 import sys
+import argparse
 from dotenv import load_dotenv
+from component_pages import (iter_component_pages, write_json_array, IncompleteCollectionError,
+                             COMPONENT_PAGE_SIZE, DEFAULT_MAX_WORKERS)
+from rate_limiter import get_rate_limiter
+
+V1_FILTER = "'name'~'Deprecated'"
 
 def get_api_config():
     """
@@ -36,58 +45,27 @@ def get_api_headers():
     headers, _ = get_api_config()
     return headers
 
-def collect_v1_components():
+def iter_v1_components(page_size=COMPONENT_PAGE_SIZE, max_workers=DEFAULT_MAX_WORKERS):
     """
-    Collect all v1 (deprecated) components from the API
+    Yield every v1 (deprecated) component, page by page
     """
     headers, base_url = get_api_config()
-    url = f"{base_url}/components?filter='name'~'Deprecated'&size=200000"
-    #url = f"{base_url}/components?size=200000"
-    
-    print(f"🌐 Making API request to: {url}")
-    
+    print(f"🌐 Collecting components matching {V1_FILTER} from: {base_url}/components")
+    for items in iter_component_pages(base_url, headers, V1_FILTER, page_size, max_workers):
+        yield from items
+
+def collect_v1_components(page_size=COMPONENT_PAGE_SIZE, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Collect all v1 (deprecated) components from the API
+    """
     try:
-        response = requests.get(url, headers=headers, timeout=60)
-        response.raise_for_status()
-        
-        print(f"✅ API response status: {response.status_code}")
-        
-        data = response.json()
-        print(f"🔍 Response keys: {list(data.keys())}")
-        
-        # Check if _embedded exists and what's in it
-        if '_embedded' in data:
-            embedded = data['_embedded']
-            print(f"🔍 _embedded keys: {list(embedded.keys())}")
-            # Try both 'items' and 'component' keys
-            components = embedded.get('items', embedded.get('component', []))
-        else:
-            print("⚠️  No '_embedded' key found in response")
-            # Maybe components are directly in the response?
-            components = data if isinstance(data, list) else []
-        
-        # Check pagination info
-        page_info = data.get('page', {})
-        if page_info:
-            total_elements = page_info.get('totalElements', 'unknown')
-            size = page_info.get('size', 'unknown')
-            number = page_info.get('number', 'unknown')
-            total_pages = page_info.get('totalPages', 'unknown')
-            print(f"📊 API returned {len(components)} components (page {number + 1 if isinstance(number, int) else 'unknown'} of {total_pages})")
-            print(f"📈 Pagination info: {size} per page, {total_elements} total elements")
-            
-            if isinstance(total_elements, int) and total_elements > len(components):
-                print(f"⚠️  WARNING: There are {total_elements} total components but we only got {len(components)}")
-                print("   This means the API has pagination limits. You may need to implement pagination.")
-        else:
-            print(f"📊 API returned {len(components)} components")
-        
-        # If we have components, show the structure of the first one
-        if components and len(components) > 0:
-            print(f"🔍 First component keys: {list(components[0].keys())}")
-        
+        components = list(iter_v1_components(page_size, max_workers))
+        print(f"📊 API returned {len(components)} components")
         return components
         
+    except IncompleteCollectionError as e:
+        print(f"❌ Incomplete component collection: {e}")
+        return []
     except requests.exceptions.RequestException as e:
         print(f"❌ API request failed: {e}")
         return []
@@ -111,30 +89,59 @@ def save_to_json(components, filename):
         print(f"Error saving to {filename}: {e}")
         return False
 
+def parse_args(argv=None):
+    """
+    Parse the Phase 1 command line options
+    """
+    parser = argparse.ArgumentParser(description="Phase 1: Collect v1 deprecated components")
+    parser.add_argument('--page-size', type=int, default=COMPONENT_PAGE_SIZE,
+                        help=f"components per request (default: {COMPONENT_PAGE_SIZE})")
+    parser.add_argument('--max-workers', type=int, default=DEFAULT_MAX_WORKERS,
+                        help=f"concurrent page requests (default: {DEFAULT_MAX_WORKERS})")
+    parser.add_argument('--max-rps', type=float, help="starting requests per second (default: MAX_RPS from .env, or 5)")
+    return parser.parse_args(argv)
+
 def main():
     """
     Main function to execute Phase 1
     """
+    args = parse_args()
     print("=== Phase 1: Collecting v1 Deprecated Components ===")
     
-    # Collect v1 components
-    v1_components = collect_v1_components()
+    load_dotenv()
+    get_rate_limiter(args.max_rps)
+    
+    # Stream v1 components straight into v1_components.json
+    output_file = 'v1_components.json'
+    preview = []
     
-    if v1_components:
-        # Save to v1_components.json
-        output_file = 'v1_components.json'
-        if save_to_json(v1_components, output_file):
-            print(f"\n✅ Phase 1 completed successfully!")
-            print(f"📁 Output: {output_file}")
-            print(f"📊 Total v1 components collected: {len(v1_components)}")
-            
-            # Display first few components as preview
-            if len(v1_components) > 0:
-                print("\n📋 Preview of first component:")
-                print(json.dumps(v1_components[0], indent=2))
-        else:
-            print("\n❌ Phase 1 failed: Could not save components to file")
-            exit(1)
+    def components():
+        for component in iter_v1_components(max(1, args.page_size), max(1, args.max_workers)):
+            if not preview:
+                preview.append(component)
+            yield component
+    
+    try:
+        count = write_json_array(components(), output_file)
+    except IncompleteCollectionError as e:
+        print(f"\n❌ Phase 1 failed: Incomplete component collection: {e}")
+        exit(1)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"\n❌ Phase 1 failed: API request failed: {e}")
+        exit(1)
+    except OSError as e:
+        print(f"\n❌ Phase 1 failed: Could not save components to file: {e}")
+        exit(1)
+    
+    if count:
+        print(f"Successfully saved {count} components to {output_file}")
+        print(f"\n✅ Phase 1 completed successfully!")
+        print(f"📁 Output: {output_file}")
+        print(f"📊 Total v1 components collected: {count}")
+        
+        # Display first component as preview
+        print("\n📋 Preview of first component:")
+        print(json.dumps(preview[0], indent=2))
     else:
         print("\n❌ Phase 1 failed: No components were collected")
         exit(1)
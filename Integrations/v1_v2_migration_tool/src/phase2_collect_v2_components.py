@@ -5,13 +5,23 @@ Phase 2: Collect v2 components (non-deprecated)
 This script queries the API to collect all components and then filters out
 any components that contain 'Deprecated' in their name to build the v2 list.
 Saves the id, referenceId, and name to v2_components.json
+
+Components are fetched in bounded pages (concurrently) and streamed to the
+output file; the run fails rather than saving a truncated list.
 """
 
 import requests
 import json
 import os
+import re
 import sys
+import argparse
 from dotenv import load_dotenv
+from component_pages import (iter_component_pages, write_json_array, IncompleteCollectionError,
+                             COMPONENT_PAGE_SIZE, DEFAULT_MAX_WORKERS)
+from rate_limiter import get_rate_limiter
+
+DEPRECATED_PATTERN = re.compile(r'\bdeprecated\b', re.IGNORECASE)
 
 def get_api_config():
     """
@@ -37,41 +47,27 @@ def get_api_headers():
     headers, _ = get_api_config()
     return headers
 
-def collect_v2_components():
+def iter_all_components(page_size=COMPONENT_PAGE_SIZE, max_workers=DEFAULT_MAX_WORKERS):
     """
-    Collect all components from the API (which will be v2 components)
+    Yield every component of the catalogue, page by page
     """
     headers, base_url = get_api_config()
-    url = f"{base_url}/components?size=200000"
-    
-    print(f"🌐 Making API request to: {url}")
-    
+    print(f"🌐 Collecting all components from: {base_url}/components")
+    for items in iter_component_pages(base_url, headers, None, page_size, max_workers):
+        yield from items
+
+def collect_v2_components(page_size=COMPONENT_PAGE_SIZE, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Collect all components from the API (which will be v2 components)
+    """
     try:
-        response = requests.get(url, headers=headers, timeout=60)
-        response.raise_for_status()
-        
-        data = response.json()
-        embedded = data.get('_embedded', {})
-        components = embedded.get('items', embedded.get('component', []))
-        
-        # Check pagination info
-        page_info = data.get('page', {})
-        if page_info:
-            total_elements = page_info.get('totalElements', 'unknown')
-            size = page_info.get('size', 'unknown')
-            number = page_info.get('number', 'unknown')
-            total_pages = page_info.get('totalPages', 'unknown')
-            print(f"📊 API returned {len(components)} components (page {number + 1 if isinstance(number, int) else 'unknown'} of {total_pages})")
-            print(f"📈 Pagination info: {size} per page, {total_elements} total elements")
-            
-            if isinstance(total_elements, int) and total_elements > len(components):
-                print(f"⚠️  WARNING: There are {total_elements} total components but we only got {len(components)}")
-                print("   This means the API has pagination limits. You may need to implement pagination.")
-        else:
-            print(f"📊 API returned {len(components)} components")
-        
+        components = list(iter_all_components(page_size, max_workers))
+        print(f"📊 API returned {len(components)} components")
         return components
         
+    except IncompleteCollectionError as e:
+        print(f"❌ Incomplete component collection: {e}")
+        return []
     except requests.exceptions.RequestException as e:
         print(f"❌ API request failed: {e}")
         return []
@@ -82,27 +78,29 @@ def collect_v2_components():
         print(f"❌ Unexpected error: {e}")
         return []
 
+def is_v2_component(component):
+    """
+    True unless the name contains 'deprecated' as a standalone word (case insensitive)
+    """
+    # Use word boundary regex to avoid matching 'deprecated' within other words
+    return not DEPRECATED_PATTERN.search(component.get('name') or '')
+
+def to_v2_component(component):
+    """
+    Keep only the id, referenceId and name of a component
+    """
+    return {
+        'id': component.get('id'),
+        'referenceId': component.get('referenceId'),
+        'name': component.get('name')
+    }
+
 def filter_v2_components(all_components):
     """
     Filter out deprecated components to get v2 components
     Returns a list of v2 components with id, referenceId, and name
     """
-    import re
-    v2_components = []
-    
-    for component in all_components:
-        component_name = component.get('name', '')
-        
-        # Filter out any components that contain 'deprecated' as a standalone word (case insensitive)
-        # Use word boundary regex to avoid matching 'deprecated' within other words
-        deprecated_pattern = r'\bdeprecated\b'
-        if not re.search(deprecated_pattern, component_name, re.IGNORECASE):
-            v2_component = {
-                'id': component.get('id'),
-                'referenceId': component.get('referenceId'),
-                'name': component.get('name')
-            }
-            v2_components.append(v2_component)
+    v2_components = [to_v2_component(c) for c in all_components if is_v2_component(c)]
     
     print(f"Filtered to {len(v2_components)} v2 (non-deprecated) components")
     return v2_components
@@ -120,48 +118,75 @@ def save_to_json(components, filename):
         print(f"Error saving to {filename}: {e}")
         return False
 
+def parse_args(argv=None):
+    """
+    Parse the Phase 2 command line options
+    """
+    parser = argparse.ArgumentParser(description="Phase 2: Collect v2 (non-deprecated) components")
+    parser.add_argument('--page-size', type=int, default=COMPONENT_PAGE_SIZE,
+                        help=f"components per request (default: {COMPONENT_PAGE_SIZE})")
+    parser.add_argument('--max-workers', type=int, default=DEFAULT_MAX_WORKERS,
+                        help=f"concurrent page requests (default: {DEFAULT_MAX_WORKERS})")
+    parser.add_argument('--max-rps', type=float, help="starting requests per second (default: MAX_RPS from .env, or 5)")
+    return parser.parse_args(argv)
+
 def main():
     """
     Main function to execute Phase 2
     """
+    args = parse_args()
     print("=== Phase 2: Collecting v2 (Non-Deprecated) Components ===")
     
-    # Collect all components
-    all_components = collect_v2_components()
+    load_dotenv()
+    get_rate_limiter(args.max_rps)
     
-    if all_components:
-        # Filter to get v2 components (remove deprecated ones)
-        v2_components = filter_v2_components(all_components)
-        
-        if v2_components:
-            # Save to v2_components.json
-            output_file = 'v2_components.json'
-            if save_to_json(v2_components, output_file):
-                print(f"\n✅ Phase 2 completed successfully!")
-                print(f"📁 Output: {output_file}")
-                print(f"📊 Total v2 components collected: {len(v2_components)}")
-                
-                # Display first few components as preview
-                if len(v2_components) > 0:
-                    print("\n📋 Preview of first component:")
-                    print(json.dumps(v2_components[0], indent=2))
-                    
-                # Show statistics
-                total_components = len(all_components)
-                deprecated_components = total_components - len(v2_components)
-                print(f"\n📈 Statistics:")
-                print(f"   Total components: {total_components}")
-                print(f"   Deprecated components filtered out: {deprecated_components}")
-                print(f"   V2 components remaining: {len(v2_components)}")
-            else:
-                print("\n❌ Phase 2 failed: Could not save components to file")
-                exit(1)
-        else:
-            print("\n❌ Phase 2 failed: No v2 components found after filtering")
-            exit(1)
-    else:
+    # Stream the filtered components straight into v2_components.json
+    output_file = 'v2_components.json'
+    stats = {'total': 0}
+    preview = []
+    
+    def v2_components():
+        for component in iter_all_components(max(1, args.page_size), max(1, args.max_workers)):
+            stats['total'] += 1
+            if is_v2_component(component):
+                v2_component = to_v2_component(component)
+                if not preview:
+                    preview.append(v2_component)
+                yield v2_component
+    
+    try:
+        count = write_json_array(v2_components(), output_file)
+    except IncompleteCollectionError as e:
+        print(f"\n❌ Phase 2 failed: Incomplete component collection: {e}")
+        exit(1)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"\n❌ Phase 2 failed: API request failed: {e}")
+        exit(1)
+    except OSError as e:
+        print(f"\n❌ Phase 2 failed: Could not save components to file: {e}")
+        exit(1)
+    
+    if not stats['total']:
         print("\n❌ Phase 2 failed: No components were collected from API")
         exit(1)
+    if not count:
+        print("\n❌ Phase 2 failed: No v2 components found after filtering")
+        exit(1)
+    
+    print(f"Successfully saved {count} components to {output_file}")
+    print(f"\n✅ Phase 2 completed successfully!")
+    print(f"📁 Output: {output_file}")
+    print(f"📊 Total v2 components collected: {count}")
+    
+    # Display first component as preview
+    print("\n📋 Preview of first component:")
+    print(json.dumps(preview[0], indent=2))
+    
+    # Show statistics
+    print(f"\n📈 Statistics:")
+    print(f"   Total components: {stats['total']}")
+    print(f"   Deprecated components filtered out: {stats['total'] - count}")
+    print(f"   V2 components remaining: {count}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
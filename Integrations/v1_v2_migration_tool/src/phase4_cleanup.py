@@ -7,6 +7,8 @@ This script:
 2. For each successful risk pattern transfer, performs a DELETE request to remove it
 3. Uses the DELETE API: /api/v2/components/{v1_component_id}/risk-patterns/{risk_pattern_id}
 4. Logs all cleanup actions to cleanup.log
+5. Appends every removal to migration_journal.jsonl so an interrupted cleanup
+   skips the risk patterns it already removed
 """
 
 import requests
@@ -16,6 +18,8 @@ from dotenv import load_dotenv
 import time
 import logging
 from datetime import datetime
+from rate_limiter import limited_request
+from migration_journal import MigrationJournal
 
 def setup_logging():
     """
@@ -148,7 +152,7 @@ def remove_risk_pattern_from_component(v1_component_id, risk_pattern_id, risk_pa
         logger.info(f"DELETE {url} - Removing risk pattern '{risk_pattern_name}' (ID: {risk_pattern_id})")
         print(f"    🗑️  Removing risk pattern '{risk_pattern_name}' (ID: {risk_pattern_id})")
         
-        response = requests.delete(url, headers=headers)
+        response = limited_request(lambda: requests.delete(url, headers=headers))
         
         if response.status_code in [200, 204, 404]:  # 404 might mean already removed
             if response.status_code == 404:
@@ -175,13 +179,17 @@ def remove_risk_pattern_from_component(v1_component_id, risk_pattern_id, risk_pa
         print(f"    ❌ Unexpected error: {error_msg}")
         return False, error_msg
 
-def cleanup_risk_patterns(successful_transfers, v1_lookup, logger, max_cleanups=None):
+def cleanup_risk_patterns(successful_transfers, v1_lookup, logger, max_cleanups=None, journal=None):
     """
     Clean up (remove) risk patterns that were previously transferred
+
+    Risk patterns the journal already records as removed are not sent again.
     """
+    journal = journal or MigrationJournal(path=None)
     cleanup_results = []
     total_successful = 0
     total_failed = 0
+    total_skipped = 0
     
     # Limit processing for testing if specified
     transfers_to_process = successful_transfers[:max_cleanups] if max_cleanups else successful_transfers
@@ -223,12 +231,19 @@ def cleanup_risk_patterns(successful_transfers, v1_lookup, logger, max_cleanups=
             risk_pattern_id = transfer_detail['risk_pattern_id']
             risk_pattern_name = transfer_detail['risk_pattern_name']
             
-            success, error = remove_risk_pattern_from_component(
-                v1_uuid,
-                risk_pattern_id,
-                risk_pattern_name,
-                logger
-            )
+            if journal.is_done('remove', v1_ref_id, risk_pattern_id):
+                print(f"    ⏭️  Already removed in a previous run: '{risk_pattern_name}'")
+                total_skipped += 1
+                success, error = True, None
+            else:
+                success, error = remove_risk_pattern_from_component(
+                    v1_uuid,
+                    risk_pattern_id,
+                    risk_pattern_name,
+                    logger
+                )
+                journal.record('remove', v1_ref_id, risk_pattern_id, success, error,
+                               v1_id=v1_uuid, risk_pattern_name=risk_pattern_name)
             
             cleanup_detail = {
                 'risk_pattern_id': risk_pattern_id,
@@ -244,9 +259,6 @@ def cleanup_risk_patterns(successful_transfers, v1_lookup, logger, max_cleanups=
             else:
                 component_failed += 1
                 total_failed += 1
-            
-            # Rate limiting between DELETE calls
-            time.sleep(0.5)
         
         # Record results for this component
         cleanup_results.append({
@@ -259,13 +271,10 @@ def cleanup_risk_patterns(successful_transfers, v1_lookup, logger, max_cleanups=
         
         logger.info(f"COMPONENT_CLEANUP_COMPLETE: {v1_ref_id} -> {component_successful} successful, {component_failed} failed")
         print(f"  📊 Component cleanup: {component_successful} successful, {component_failed} failed")
-        
-        # Rate limiting between components
-        time.sleep(1.0)
     
     print(f"\n📊 Overall Cleanup Summary:")
     print(f"   Total components processed: {len(component_groups)}")
-    print(f"   Successful removals: {total_successful}")
+    print(f"   Successful removals: {total_successful} ({total_skipped} from a previous run)")
     print(f"   Failed removals: {total_failed}")
     print(f"   Success rate: {(total_successful/(total_successful+total_failed)*100):.1f}%" if (total_successful+total_failed) > 0 else "   Success rate: N/A")
     
@@ -317,7 +326,8 @@ def main():
     print(f"This will remove all risk patterns that were added in Phase 4b.")
     
     # Cleanup risk patterns for all transfers
-    cleanup_results = cleanup_risk_patterns(successful_transfers, v1_lookup, logger, max_cleanups=None)
+    with MigrationJournal() as journal:
+        cleanup_results = cleanup_risk_patterns(successful_transfers, v1_lookup, logger, max_cleanups=None, journal=journal)
     
     if cleanup_results:
         # Save results
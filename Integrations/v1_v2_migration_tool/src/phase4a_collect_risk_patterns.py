@@ -7,6 +7,12 @@ This script:
 2. For each matched pair, finds the risk patterns attached to the v2 component
 3. Saves the collected risk patterns to matching_risk_patterns.json
 4. Does NOT transfer anything yet - just collects the data
+
+Components are queried concurrently over one shared HTTP session, every
+/risk-patterns listing is followed page by page, and mappings are written
+to the output file as soon as they are collected (in mapping order).
+If any component's listing cannot be read completely the run fails and the
+previous output file is left untouched, rather than saving a truncated list.
 """
 
 import requests
@@ -16,7 +22,26 @@ import sys
 from dotenv import load_dotenv
 import time
 import logging
+import argparse
+import textwrap
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+from rate_limiter import limited_request, get_rate_limiter
+
+DEFAULT_MAX_WORKERS = 8
+RISK_PATTERN_PAGE_SIZE = 500
+OUTPUT_FILE = 'matching_risk_patterns.json'
+
+_session = None
+_api_config = None
+_shared_lock = threading.Lock()
+
+class RiskPatternCollectionError(Exception):
+    """
+    Raised when a component's risk patterns could not be collected completely
+    """
 
 def load_mappings():
     """
@@ -65,6 +90,24 @@ def get_api_headers():
     headers, _ = get_api_config()
     return headers
 
+def get_shared_api(pool_size=DEFAULT_MAX_WORKERS):
+    """
+    Return the (session, headers, base_url) shared by every worker thread
+
+    The .env file is read and the connection pool created only once, sized
+    by the first caller (collect_risk_patterns passes its max_workers).
+    """
+    global _session, _api_config
+    with _shared_lock:
+        if _session is None:
+            _api_config = get_api_config()
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            _session.mount('https://', adapter)
+            _session.mount('http://', adapter)
+            _session.headers.update(_api_config[0])
+    return _session, _api_config[0], _api_config[1]
+
 def load_component_ids():
     """
     Load component IDs from the v1_components.json and v2_components.json files
@@ -144,59 +187,56 @@ def find_component_risk_patterns(component_ref_id, component_lookup):
 def get_component_risk_patterns_direct(component_uuid):
     """
     Get risk patterns directly from the component using the /risk-patterns endpoint
+
+    Follows the listing page by page until the last page. Raises
+    RiskPatternCollectionError if any page fails, so a partial listing is
+    never mistaken for the component's complete set of risk patterns.
     """
-    headers, base_url = get_api_config()
-    
-    # Use the correct endpoint with subdomain from environment
-    url = f"{base_url}/components/{component_uuid}/risk-patterns?page=0&size=2000"
+    session, _, base_url = get_shared_api()
+    url = f"{base_url}/components/{component_uuid}/risk-patterns"
+    risk_patterns = []
+    page = 0
     
     try:
-        print(f"    � Getting risk patterns from: {url}")
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        
-        data = response.json()
-        risk_patterns = []
-        
-        # Extract risk patterns from the response
-        if '_embedded' in data and 'items' in data['_embedded']:
-            items = data['_embedded']['items']
-            print(f"    ✅ Found {len(items)} risk patterns")
+        while True:
+            params = {'page': page, 'size': RISK_PATTERN_PAGE_SIZE}
+            response = limited_request(lambda: session.get(url, params=params, timeout=60))
+            response.raise_for_status()
             
+            data = response.json()
+            items = data.get('_embedded', {}).get('items', [])
             for item in items:
-                risk_pattern = {
+                risk_patterns.append({
                     'id': item.get('id'),  # This is the risk pattern ID we need
                     'name': item.get('name'),
                     'referenceId': item.get('referenceId'),
                     'description': item.get('description', ''),
                     'library': item.get('library', {}),
                     'source_component_id': component_uuid
-                }
-                
-                risk_patterns.append(risk_pattern)
-                print(f"      - {risk_pattern['name']} (ID: {risk_pattern['id']})")
-        else:
-            print(f"    ℹ️  No risk patterns found for component")
+                })
+            
+            total_pages = data.get('page', {}).get('totalPages')
+            page += 1
+            if not items or 'next' not in data.get('_links', {}) and (total_pages is None or page >= total_pages):
+                break
         
         return risk_patterns
         
-    except requests.exceptions.RequestException as e:
-        print(f"    ❌ Error getting risk patterns: {e}")
-        return []
-    except Exception as e:
-        print(f"    ❌ Unexpected error: {e}")
-        return []
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"    ❌ Error getting risk patterns for component {component_uuid} (page {page}): {e}")
+        raise RiskPatternCollectionError(
+            f"component {component_uuid}: page {page} failed after {len(risk_patterns)} risk patterns: {e}") from e
 
 def get_risk_pattern_details(risk_pattern_url):
     """
     Get risk pattern details from a specific URL
     Following plan.md structure
     """
-    headers = get_api_headers()
+    session, _, _ = get_shared_api()
     
     try:
         print(f"    📋 Getting risk pattern details from: {risk_pattern_url}")
-        response = requests.get(risk_pattern_url, headers=headers)
+        response = limited_request(lambda: session.get(risk_pattern_url, timeout=60))
         response.raise_for_status()
         
         data = response.json()
@@ -220,49 +260,96 @@ def get_risk_pattern_details(risk_pattern_url):
         print(f"    ❌ Unexpected error: {e}")
         return None
 
-def collect_risk_patterns(mappings, component_lookup, max_mappings=None):
+def collect_mapping(mapping, component_lookup):
+    """
+    Collect the risk patterns of one mapping's v2 component (runs on a worker thread)
+
+    Returns (mapping_result, error); on failure mapping_result is None.
+    """
+    try:
+        v2_risk_patterns = find_component_risk_patterns(mapping['v2_component']['referenceId'], component_lookup)
+    except RiskPatternCollectionError as e:
+        return None, e
+    
+    # Store the mapping info (even if no risk patterns found)
+    return {
+        'v1_component': mapping['v1_component'],
+        'v2_component': mapping['v2_component'],
+        'risk_patterns': v2_risk_patterns,
+        'risk_patterns_count': len(v2_risk_patterns),
+        'collection_timestamp': time.time()
+    }, None
+
+def collect_risk_patterns(mappings, component_lookup, max_mappings=None, max_workers=DEFAULT_MAX_WORKERS, output_file=None):
     """
     Collect risk patterns from v2 components (no transfers yet)
+
+    Mappings are collected concurrently and, if output_file is given, appended
+    to it in mapping order as they complete. The file is written as
+    <output_file>.part and renamed once the JSON array is complete.
+
+    Mappings whose risk patterns could not be collected are reported and the
+    run raises RiskPatternCollectionError at the end; the .part file is then
+    discarded so the previous output is kept.
     """
     matching_risk_patterns = []
+    failed = []
     
     # Limit processing for testing
     mappings_to_process = mappings[:max_mappings] if max_mappings else mappings
     
-    print(f"Collecting risk patterns from {len(mappings_to_process)} matched mappings...")
+    print(f"Collecting risk patterns from {len(mappings_to_process)} matched mappings ({max_workers} workers)...")
+    get_shared_api(pool_size=max_workers)
     
-    for i, mapping in enumerate(mappings_to_process):
-        print(f"\n[{i+1}/{len(mappings_to_process)}] Processing mapping:")
-        
-        v1_component = mapping['v1_component']
-        v2_component = mapping['v2_component']
-        
-        print(f"  V1: {v1_component.get('name', 'Unknown')} ({v1_component['referenceId']})")
-        print(f"  V2: {v2_component['name']} ({v2_component['referenceId']})")
-        
-        # Find risk patterns attached to v2 component
-        v2_risk_patterns = find_component_risk_patterns(v2_component['referenceId'], component_lookup)
-        
-        # Store the mapping info (even if no risk patterns found)
-        risk_pattern_mapping = {
-            'v1_component': v1_component,
-            'v2_component': v2_component,
-            'risk_patterns': v2_risk_patterns,
-            'risk_patterns_count': len(v2_risk_patterns),
-            'collection_timestamp': time.time()
-        }
-        
-        if v2_risk_patterns:
-            print(f"  📋 Found {len(v2_risk_patterns)} risk patterns in v2 component")
-            for rp in v2_risk_patterns:
-                print(f"    - {rp['name']} (ID: {rp['id']})")
-        else:
-            print(f"  ℹ️  No risk patterns found for v2 component")
+    out = None
+    if output_file:
+        out = open(f"{output_file}.part", 'w', encoding='utf-8')
+        out.write('[')
+    
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(lambda m: collect_mapping(m, component_lookup), mappings_to_process)
+            for i, (mapping, (risk_pattern_mapping, error)) in enumerate(zip(mappings_to_process, results)):
+                v1_component = mapping['v1_component']
+                v2_component = mapping['v2_component']
+                
+                print(f"\n[{i+1}/{len(mappings_to_process)}] V1: {v1_component.get('name', 'Unknown')} ({v1_component['referenceId']})"
+                      f" -> V2: {v2_component['name']} ({v2_component['referenceId']})")
+                if error is not None:
+                    print(f"  ❌ Risk pattern collection failed: {error}")
+                    failed.append((v2_component['referenceId'], error))
+                    continue
+                v2_risk_patterns = risk_pattern_mapping['risk_patterns']
+                if v2_risk_patterns:
+                    print(f"  📋 Found {len(v2_risk_patterns)} risk patterns in v2 component")
+                    for rp in v2_risk_patterns:
+                        print(f"    - {rp['name']} (ID: {rp['id']})")
+                else:
+                    print(f"  ℹ️  No risk patterns found for v2 component")
+                
+                if out and not failed:
+                    # Same layout as json.dump(..., indent=2) of the whole list
+                    out.write(',\n' if matching_risk_patterns else '\n')
+                    out.write(textwrap.indent(json.dumps(risk_pattern_mapping, indent=2, ensure_ascii=False), '  '))
+                    out.flush()
+                matching_risk_patterns.append(risk_pattern_mapping)
         
-        matching_risk_patterns.append(risk_pattern_mapping)
+        if failed:
+            raise RiskPatternCollectionError(
+                f"risk patterns of {len(failed)} of {len(mappings_to_process)} components could not be collected "
+                f"({', '.join(ref for ref, _ in failed[:10])}{', ...' if len(failed) > 10 else ''}); "
+                f"please run this phase again")
         
-        # Rate limiting
-        time.sleep(0.3)
+        if out:
+            out.write('\n]' if matching_risk_patterns else ']')
+            out.close()
+            os.replace(f"{output_file}.part", output_file)
+            print(f"\nSuccessfully saved risk patterns to {output_file}")
+    finally:
+        if out and not out.closed:
+            out.close()
+            if os.path.exists(f"{output_file}.part"):
+                os.remove(f"{output_file}.part")
     
     # Summary statistics
     total_risk_patterns = sum(len(m['risk_patterns']) for m in matching_risk_patterns)
@@ -289,12 +376,28 @@ def save_risk_patterns(risk_patterns, filename):
         print(f"Error saving to {filename}: {e}")
         return False
 
+def parse_args(argv=None):
+    """
+    Parse the Phase 4a command line options
+    """
+    parser = argparse.ArgumentParser(description="Phase 4a: Collect risk pattern IDs from v2 components")
+    parser.add_argument('--test', action='store_true', help="only process the first 10 mappings")
+    parser.add_argument('--max-rps', type=float, help="starting requests per second (default: MAX_RPS from .env, or 5)")
+    parser.add_argument('--max-workers', type=int, default=DEFAULT_MAX_WORKERS,
+                        help=f"concurrent component requests (default: {DEFAULT_MAX_WORKERS})")
+    return parser.parse_args(argv)
+
 def main():
     """
     Main function to execute Phase 4a (collection only)
     """
+    args = parse_args()
     print("=== Phase 4a: Collect Risk Pattern IDs from v2 Components ===")
     
+    # Create the shared limiter up front so --max-rps takes precedence over MAX_RPS
+    load_dotenv()
+    get_rate_limiter(args.max_rps)
+    
     # Load mappings
     mappings = load_mappings()
     if not mappings:
@@ -307,7 +410,7 @@ def main():
         exit(1)
     
     # Check if this is a test run
-    test_mode = len(sys.argv) > 1 and sys.argv[1] == "--test"
+    test_mode = args.test
     max_mappings = 10 if test_mode else None
     
     if test_mode:
@@ -317,12 +420,21 @@ def main():
         print(f"\n📋 Starting risk pattern collection for ALL {len(mappings)} v2 components...")
         print(f"This will process all matched v1-v2 pairs to collect risk patterns.")
     
-    matching_risk_patterns = collect_risk_patterns(mappings, component_lookup, max_mappings=max_mappings)
+    output_file = OUTPUT_FILE
+    try:
+        matching_risk_patterns = collect_risk_patterns(mappings, component_lookup, max_mappings=max_mappings,
+                                                       max_workers=max(1, args.max_workers), output_file=output_file)
+        saved = True
+    except RiskPatternCollectionError as e:
+        print(f"\n❌ Phase 4a failed: {e}")
+        print(f"   {output_file} was not updated")
+        exit(1)
+    except OSError as e:
+        print(f"Error saving to {output_file}: {e}")
+        matching_risk_patterns, saved = [], False
     
     if matching_risk_patterns:
-        # Save risk patterns mapping
-        output_file = 'matching_risk_patterns.json'
-        if save_risk_patterns(matching_risk_patterns, output_file):
+        if saved:
             print(f"\n✅ Phase 4a completed successfully!")
             print(f"📁 Output: {output_file}")
             
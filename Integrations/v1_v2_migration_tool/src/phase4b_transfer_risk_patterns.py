@@ -7,6 +7,10 @@ This script:
 2. For each v1-v2 mapping with risk patterns, adds the v2 risk patterns to the v1 component
 3. Uses the POST API: /api/v2/components/{v1_component_id}/risk-patterns
 4. Tracks success/failure for each transfer
+5. Sends the POSTs concurrently, paced by the shared adaptive rate limiter
+   (--max-rps, or MAX_RPS in .env)
+6. Appends every outcome to migration_journal.jsonl so an interrupted run
+   resumes where it stopped; phase4b_transfer_results.json is derived from it
 """
 
 import requests
@@ -16,7 +20,13 @@ import sys
 from dotenv import load_dotenv
 import time
 import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from rate_limiter import limited_request, get_rate_limiter
+from migration_journal import MigrationJournal, JOURNAL_FILE
+
+DEFAULT_MAX_WORKERS = 8
 
 def get_api_config():
     """
@@ -159,7 +169,7 @@ def add_risk_pattern_to_component(v1_component_id, risk_pattern_id, risk_pattern
         logger.info(f"POST {url} - Adding risk pattern '{risk_pattern_name}' (ID: {risk_pattern_id})")
         print(f"    🔄 Adding risk pattern '{risk_pattern_name}' (ID: {risk_pattern_id})")
         
-        response = requests.post(url, headers=headers, json=payload)
+        response = limited_request(lambda: requests.post(url, headers=headers, json=payload))
         
         if response.status_code in [200, 201, 204]:
             logger.info(f"SUCCESS: Added risk pattern '{risk_pattern_name}' to component {v1_component_id}")
@@ -182,37 +192,19 @@ def add_risk_pattern_to_component(v1_component_id, risk_pattern_id, risk_pattern
         print(f"    ❌ Unexpected error: {error_msg}")
         return False, error_msg
 
-def transfer_risk_patterns(mappings, v1_lookup, logger, max_mappings=None):
+def build_transfer_results(mappings, v1_lookup, journal):
     """
-    Transfer risk patterns from v2 to v1 components
+    Derive the per-mapping transfer results from the journal
+
+    Risk patterns without a journal entry yet (interrupted run) are left out.
     """
     transfer_results = []
-    total_successful = 0
-    total_failed = 0
-    total_risk_patterns = 0
-    
-    # Limit processing for testing if specified
-    mappings_to_process = mappings[:max_mappings] if max_mappings else mappings
-    
-    logger.info(f"=== PHASE 4B TRANSFER START === Processing {len(mappings_to_process)} mappings")
-    print(f"Transferring risk patterns for {len(mappings_to_process)} component mappings...")
-    
-    for i, mapping in enumerate(mappings_to_process):
-        print(f"\n[{i+1}/{len(mappings_to_process)}] Processing mapping:")
-        
+    for mapping in mappings:
         v1_component = mapping['v1_component']
         v2_component = mapping['v2_component']
-        risk_patterns = mapping['risk_patterns']
-        
-        print(f"  V1: {v1_component.get('name', 'Unknown')} ({v1_component['referenceId']})")
-        print(f"  V2: {v2_component['name']} ({v2_component['referenceId']})")
-        print(f"  Risk patterns to transfer: {len(risk_patterns)}")
-        
-        # Get v1 component UUID
         v1_ref_id = v1_component['referenceId']
         
         if v1_ref_id not in v1_lookup:
-            print(f"  ⚠️  V1 component UUID not found for {v1_ref_id}")
             transfer_results.append({
                 'v1_component': v1_component,
                 'v2_component': v2_component,
@@ -222,67 +214,122 @@ def transfer_risk_patterns(mappings, v1_lookup, logger, max_mappings=None):
             })
             continue
         
-        v1_uuid = v1_lookup[v1_ref_id]['id']
-        print(f"  V1 UUID: {v1_uuid}")
+        entries = [journal.last(v1_ref_id, rp['id']) for rp in mapping['risk_patterns']]
+        entries = [e for e in entries if e is not None and e['op'] == 'transfer']
+        transfer_details = [{
+            'risk_pattern_id': e['risk_pattern_id'],
+            'risk_pattern_name': e.get('risk_pattern_name'),
+            'success': e['success'],
+            'error': e['error']
+        } for e in entries]
+        mapping_successful = sum(1 for d in transfer_details if d['success'])
+        mapping_failed = len(transfer_details) - mapping_successful
         
-        # Transfer each risk pattern
-        transfer_details = []
-        mapping_successful = 0
-        mapping_failed = 0
-        
-        for rp in risk_patterns:
-            success, error = add_risk_pattern_to_component(
-                v1_uuid, 
-                rp['id'], 
-                rp['name'],
-                logger
-            )
-            
-            transfer_detail = {
-                'risk_pattern_id': rp['id'],
-                'risk_pattern_name': rp['name'],
-                'success': success,
-                'error': error
-            }
-            transfer_details.append(transfer_detail)
-            
-            if success:
-                mapping_successful += 1
-                total_successful += 1
-            else:
-                mapping_failed += 1
-                total_failed += 1
-            
-            total_risk_patterns += 1
-            
-            # Longer rate limiting between API calls
-            time.sleep(1.0)
-        
-        # Record results for this mapping
         transfer_results.append({
             'v1_component': v1_component,
             'v2_component': v2_component,
-            'status': 'COMPLETED' if mapping_failed == 0 else 'PARTIAL',
+            'status': 'COMPLETED' if mapping_failed == 0 and len(entries) == len(mapping['risk_patterns']) else 'PARTIAL',
             'successful_transfers': mapping_successful,
             'failed_transfers': mapping_failed,
             'transfers': transfer_details,
-            'timestamp': time.time()
+            'timestamp': max((e['timestamp'] for e in entries), default=time.time())
         })
+    return transfer_results
+
+def transfer_one(v1_ref_id, v1_uuid, rp, logger, journal):
+    """
+    POST one risk pattern and journal the outcome (runs on a worker thread)
+    """
+    success, error = add_risk_pattern_to_component(v1_uuid, rp['id'], rp['name'], logger)
+    journal.record('transfer', v1_ref_id, rp['id'], success, error,
+                   v1_id=v1_uuid, risk_pattern_name=rp['name'])
+    return success
+
+def transfer_risk_patterns(mappings, v1_lookup, logger, max_mappings=None, max_workers=DEFAULT_MAX_WORKERS, journal=None):
+    """
+    Transfer risk patterns from v2 to v1 components
+
+    POSTs run on a bounded thread pool and are paced by the shared adaptive
+    rate limiter. Each outcome is appended to the journal; risk patterns the
+    journal already records as transferred are skipped. The returned
+    per-mapping results are derived from the journal, in mapping order.
+    """
+    journal = journal or MigrationJournal(path=None)
+    total_successful = 0
+    total_failed = 0
+    total_risk_patterns = 0
+    total_skipped = 0
+    
+    # Limit processing for testing if specified
+    mappings_to_process = mappings[:max_mappings] if max_mappings else mappings
+    
+    logger.info(f"=== PHASE 4B TRANSFER START === Processing {len(mappings_to_process)} mappings")
+    print(f"Transferring risk patterns for {len(mappings_to_process)} component mappings "
+          f"({max_workers} workers)...")
+    
+    remaining = {}
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for i, mapping in enumerate(mappings_to_process):
+            v1_ref_id = mapping['v1_component']['referenceId']
+            
+            if v1_ref_id not in v1_lookup:
+                print(f"  ⚠️  V1 component UUID not found for {v1_ref_id}")
+                continue
+            
+            v1_uuid = v1_lookup[v1_ref_id]['id']
+            for rp in mapping['risk_patterns']:
+                if journal.is_done('transfer', v1_ref_id, rp['id']):
+                    total_skipped += 1
+                    continue
+                future = executor.submit(transfer_one, v1_ref_id, v1_uuid, rp, logger, journal)
+                futures[future] = i
+                remaining[i] = remaining.get(i, 0) + 1
         
-        logger.info(f"MAPPING_COMPLETE: V1={v1_ref_id} -> {mapping_successful} successful, {mapping_failed} failed")
-        print(f"  📊 Mapping result: {mapping_successful} successful, {mapping_failed} failed")
+        if total_skipped:
+            logger.info(f"RESUME: skipping {total_skipped} risk patterns already transferred")
+            print(f"⏭️  Skipping {total_skipped} risk patterns already transferred in a previous run")
         
-        # Longer rate limiting between component mappings
-        time.sleep(2.0)
+        try:
+            for future in as_completed(futures):
+                i = futures[future]
+                success = future.result()
+                
+                total_risk_patterns += 1
+                if success:
+                    total_successful += 1
+                else:
+                    total_failed += 1
+                
+                remaining[i] -= 1
+                if remaining[i] == 0:
+                    # Every risk pattern of this mapping is done
+                    mapping = mappings_to_process[i]
+                    v1_ref_id = mapping['v1_component']['referenceId']
+                    result = build_transfer_results([mapping], v1_lookup, journal)[0]
+                    mapping_successful = result['successful_transfers']
+                    mapping_failed = result['failed_transfers']
+                    logger.info(f"MAPPING_COMPLETE: V1={v1_ref_id} -> {mapping_successful} successful, {mapping_failed} failed")
+                    print(f"  📊 [{i+1}/{len(mappings_to_process)}] {mapping['v1_component'].get('name', 'Unknown')} ({v1_ref_id}) "
+                          f"<- {mapping['v2_component']['name']}: {mapping_successful} successful, {mapping_failed} failed")
+        except BaseException:
+            # Interrupted: let in-flight POSTs finish and be journaled, drop the rest
+            executor.shutdown(wait=True, cancel_futures=True)
+            journal.sync()
+            raise
+    
+    journal.sync()
     
     print(f"\n📊 Overall Transfer Summary:")
     print(f"   Total mappings processed: {len(mappings_to_process)}")
     print(f"   Total risk patterns transferred: {total_risk_patterns}")
+    print(f"   Skipped (already transferred): {total_skipped}")
     print(f"   Successful transfers: {total_successful}")
     print(f"   Failed transfers: {total_failed}")
     print(f"   Success rate: {(total_successful/total_risk_patterns*100):.1f}%" if total_risk_patterns > 0 else "   Success rate: N/A")
     
-    return transfer_results
+    return build_transfer_results(mappings_to_process, v1_lookup, journal)
 
 def save_transfer_results(results, filename):
     """
@@ -297,13 +344,32 @@ def save_transfer_results(results, filename):
         print(f"Error saving results to {filename}: {e}")
         return False
 
+def parse_args(argv=None):
+    """
+    Parse the Phase 4b command line options
+    """
+    parser = argparse.ArgumentParser(description="Phase 4b: Transfer v2 risk patterns to v1 components")
+    parser.add_argument('--max-rps', type=float, help="starting requests per second (default: MAX_RPS from .env, or 5)")
+    parser.add_argument('--max-workers', type=int, default=DEFAULT_MAX_WORKERS,
+                        help=f"concurrent POST requests (default: {DEFAULT_MAX_WORKERS})")
+    parser.add_argument('--results-only', action='store_true',
+                        help=f"rebuild phase4b_transfer_results.json from {JOURNAL_FILE} without sending requests")
+    return parser.parse_args(argv)
+
 def main():
     """
     Main function to execute Phase 4b (risk pattern transfer)
     """
+    args = parse_args()
+    
     # Setup logging
     logger = setup_logging()
     
+    # Create the shared limiter up front so --max-rps takes precedence over MAX_RPS
+    load_dotenv()
+    limiter = get_rate_limiter(args.max_rps)
+    logger.info(f"Rate limit: starting at {limiter.rate:.1f} requests/second, {args.max_workers} workers")
+    
     logger.info("=== PHASE 4B START ===")
     print("=== Phase 4b: Transfer v2 Risk Patterns to v1 Components ===")
     
@@ -319,6 +385,12 @@ def main():
         print("❌ Failed to load v1 component IDs")
         return
     
+    if args.results_only:
+        with MigrationJournal() as journal:
+            transfer_results = build_transfer_results(mappings, v1_lookup, journal)
+        save_transfer_results(transfer_results, 'phase4b_transfer_results.json')
+        return
+    
     # Ask user for confirmation before proceeding with full transfer
     total_transfers = sum(len(m.get('risk_patterns', [])) for m in mappings)
     print(f"\n⚠️  About to transfer {total_transfers} risk patterns across {len(mappings)} component mappings")
@@ -329,7 +401,9 @@ def main():
     print(f"This will transfer all v2 risk patterns to their corresponding v1 components.")
     
     # Transfer risk patterns for all mappings
-    transfer_results = transfer_risk_patterns(mappings, v1_lookup, logger, max_mappings=None)
+    with MigrationJournal() as journal:
+        transfer_results = transfer_risk_patterns(mappings, v1_lookup, logger, max_mappings=None,
+                                                  max_workers=max(1, args.max_workers), journal=journal)
     
     if transfer_results:
         # Save results
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Adaptive rate limiter shared by the migration phases
+
+A token bucket that starts at a configured requests-per-second budget:
+1. acquire() blocks until a request may be sent
+2. record() feeds the response status back into the limiter
+3. On 429/503 the rate is halved and all callers pause for Retry-After, or
+   for a pause that doubles with each consecutive throttle when there is none
+4. After a run of healthy responses the rate climbs back towards max_rate
+
+One limiter is shared by every thread in the process (see get_rate_limiter).
+"""
+
+import os
+import time
+import threading
+from email.utils import parsedate_to_datetime
+
+DEFAULT_MAX_RPS = 5.0
+MIN_RPS = 0.2
+THROTTLE_STATUS_CODES = (429, 503)
+BACKOFF_FACTOR = 0.5
+RAMP_UP_STEP = 0.1  # fraction of max_rate regained per healthy run
+RAMP_UP_AFTER = 10  # consecutive healthy responses before ramping up
+THROTTLE_PAUSE = 2.0  # pause after a 429/503 without Retry-After, doubled per consecutive one
+MAX_THROTTLE_PAUSE = 60.0
+MAX_THROTTLED_ATTEMPTS = 6
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def parse_retry_after(value):
+    """
+    Return the Retry-After header as seconds, or None if absent or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class AdaptiveRateLimiter:
+    """
+    Thread-safe token bucket whose rate adapts to throttling responses
+    """
+
+    def __init__(self, rate=DEFAULT_MAX_RPS, max_rate=None, min_rate=MIN_RPS, burst=None):
+        self.max_rate = float(max_rate or rate)
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.rate = min(max(float(rate), self.min_rate), self.max_rate)
+        self.burst = float(burst or max(1.0, self.rate))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.healthy = 0
+        self.throttled = 0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """
+        Block until a token is available and any Retry-After pause is over
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self.paused_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def record(self, status_code, retry_after=None):
+        """
+        Adjust the rate from a response status and its Retry-After header
+        """
+        with self.lock:
+            if status_code in THROTTLE_STATUS_CODES:
+                self.healthy = 0
+                self.throttled += 1
+                self.rate = max(self.min_rate, self.rate * BACKOFF_FACTOR)
+                delay = parse_retry_after(retry_after)
+                if delay is None:
+                    backoff = THROTTLE_PAUSE * 2 ** (self.throttled - 1)
+                    delay = max(1 / self.rate, min(MAX_THROTTLE_PAUSE, backoff))
+                self.paused_until = max(self.paused_until, time.monotonic() + delay)
+                self.tokens = min(self.tokens, 0.0)
+            elif status_code < 500:
+                self.throttled = 0
+                self.healthy += 1
+                if self.healthy >= RAMP_UP_AFTER and self.rate < self.max_rate:
+                    self.healthy = 0
+                    self.rate = min(self.max_rate, self.rate + self.max_rate * RAMP_UP_STEP)
+
+    def record_response(self, response):
+        """
+        Convenience wrapper around record() for a requests.Response
+        """
+        self.record(response.status_code, response.headers.get('Retry-After'))
+
+
+def get_rate_limiter(max_rps=None):
+    """
+    Return the process-wide limiter, created from max_rps or the MAX_RPS
+    environment variable on first use
+    """
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            try:
+                rate = float(max_rps or os.getenv('MAX_RPS') or DEFAULT_MAX_RPS)
+            except ValueError:
+                rate = DEFAULT_MAX_RPS
+            _limiter = AdaptiveRateLimiter(rate)
+    return _limiter
+
+
+def limited_request(send, limiter=None, attempts=MAX_THROTTLED_ATTEMPTS):
+    """
+    Call send() under the limiter, retrying while the server throttles
+
+    send is a zero-argument callable returning a requests.Response. The last
+    response is returned even if it is still a 429/503.
+    """
+    limiter = limiter or get_rate_limiter()
+    for attempt in range(attempts):
+        limiter.acquire()
+        response = send()
+        limiter.record_response(response)
+        if response.status_code not in THROTTLE_STATUS_CODES:
+            break
+    return response
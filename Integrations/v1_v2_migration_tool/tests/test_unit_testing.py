@@ -167,6 +167,45 @@ class TestPhase1Units(unittest.TestCase):
         components = phase1.collect_v1_components()
         
         self.assertEqual(components, [])
+    
+    @patch('phase1_collect_v1_components.requests.get')
+    @patch.dict(os.environ, {'API_TOKEN': 'test', 'SUBDOMAIN': 'test'})
+    def test_collect_v1_components_fetches_all_pages(self, mock_get):
+        """Test that every page is requested and the items are returned in page order"""
+        import phase1_collect_v1_components as phase1
+        
+        def page_response(url, headers=None, params=None, timeout=None):
+            page = params['page']
+            items = [{'id': f'comp{page}-{i}', 'name': 'Deprecated Component'} for i in range(2 if page < 2 else 1)]
+            response = MagicMock(status_code=200, headers={})
+            response.json.return_value = {
+                '_embedded': {'items': items},
+                'page': {'size': 2, 'number': page, 'totalElements': 5, 'totalPages': 3}
+            }
+            return response
+        mock_get.side_effect = page_response
+        
+        components = phase1.collect_v1_components(page_size=2, max_workers=2)
+        
+        self.assertEqual([c['id'] for c in components], ['comp0-0', 'comp0-1', 'comp1-0', 'comp1-1', 'comp2-0'])
+        self.assertEqual(sorted(c.kwargs['params']['page'] for c in mock_get.call_args_list), [0, 1, 2])
+    
+    @patch('phase1_collect_v1_components.requests.get')
+    @patch.dict(os.environ, {'API_TOKEN': 'test', 'SUBDOMAIN': 'test'})
+    def test_collect_v1_components_incomplete(self, mock_get):
+        """Test that a short collection is reported instead of silently truncated"""
+        import phase1_collect_v1_components as phase1
+        
+        mock_response = MagicMock(status_code=200, headers={})
+        mock_response.json.return_value = {
+            '_embedded': {'items': [{'id': 'comp1', 'name': 'Deprecated Component 1'}]},
+            'page': {'size': 2000, 'number': 0, 'totalElements': 3, 'totalPages': 1}
+        }
+        mock_get.return_value = mock_response
+        
+        components = phase1.collect_v1_components()
+        
+        self.assertEqual(components, [])
 
 
 class TestPhase2Units(unittest.TestCase):
@@ -390,6 +429,53 @@ class TestPhase4aUnits(unittest.TestCase):
         risk_patterns = phase4a.find_component_risk_patterns('ref-nonexistent', component_lookup)
         
         self.assertEqual(risk_patterns, [])
+    
+    def test_get_component_risk_patterns_direct_paginates(self):
+        """Test that every page of a component's risk patterns is fetched"""
+        import phase4a_collect_risk_patterns as phase4a
+        
+        pages = [
+            {'_embedded': {'items': [{'id': 'rp-1', 'name': 'RP 1'}, {'id': 'rp-2', 'name': 'RP 2'}]},
+             '_links': {'next': {'href': 'page=1'}}, 'page': {'totalPages': 2}},
+            {'_embedded': {'items': [{'id': 'rp-3', 'name': 'RP 3'}]},
+             '_links': {}, 'page': {'totalPages': 2}}
+        ]
+        session = MagicMock()
+        session.get.side_effect = [MagicMock(status_code=200, headers={}, json=MagicMock(return_value=page)) for page in pages]
+        
+        with patch('phase4a_collect_risk_patterns.get_shared_api',
+                   return_value=(session, {}, 'https://test.iriusrisk.com/api/v2')):
+            risk_patterns = phase4a.get_component_risk_patterns_direct('uuid-comp-1')
+        
+        self.assertEqual([rp['id'] for rp in risk_patterns], ['rp-1', 'rp-2', 'rp-3'])
+        self.assertEqual([c.kwargs['params']['page'] for c in session.get.call_args_list], [0, 1])
+        self.assertTrue(all(rp['source_component_id'] == 'uuid-comp-1' for rp in risk_patterns))
+
+    def test_collect_risk_patterns_fails_on_partial_listing(self):
+        """Test that a failed page fails the run instead of saving an empty list"""
+        import requests
+        import phase4a_collect_risk_patterns as phase4a
+
+        first_page = {'_embedded': {'items': [{'id': 'rp-1', 'name': 'RP 1'}]},
+                      '_links': {'next': {'href': 'page=1'}}, 'page': {'totalPages': 2}}
+        session = MagicMock()
+        session.get.side_effect = [MagicMock(status_code=200, headers={}, json=MagicMock(return_value=first_page)),
+                                   requests.exceptions.ConnectionError('connection reset')]
+        mappings = [{'v1_component': {'name': 'V1', 'referenceId': 'ref-v1'},
+                     'v2_component': {'name': 'V2', 'referenceId': 'ref-v2'}}]
+        component_lookup = {'ref-v2': {'id': 'uuid-v2', 'name': 'V2', 'type': 'v2'}}
+        with open('matching_risk_patterns.json', 'w') as f:
+            f.write('[]')
+
+        with patch('phase4a_collect_risk_patterns.get_shared_api',
+                   return_value=(session, {}, 'https://test.iriusrisk.com/api/v2')):
+            with self.assertRaises(phase4a.RiskPatternCollectionError):
+                phase4a.collect_risk_patterns(mappings, component_lookup, max_workers=1,
+                                              output_file='matching_risk_patterns.json')
+
+        with open('matching_risk_patterns.json') as f:
+            self.assertEqual(f.read(), '[]')
+        self.assertFalse(os.path.exists('matching_risk_patterns.json.part'))
 
 
 class TestPhase4bUnits(unittest.TestCase):
@@ -511,6 +597,68 @@ class TestPhase4bUnits(unittest.TestCase):
         self.assertFalse(success)
         self.assertIsNotNone(error_msg)
         self.assertIn('Network Error', str(error_msg))
+    
+    @patch('phase4b_transfer_risk_patterns.add_risk_pattern_to_component')
+    def test_transfer_risk_patterns_aggregates_per_mapping(self, mock_add):
+        """Test concurrent transfer keeps per-mapping results in mapping order"""
+        import phase4b_transfer_risk_patterns as phase4b
+        
+        mock_add.side_effect = lambda uuid, rp_id, name, logger: (rp_id != 'rp-bad', None if rp_id != 'rp-bad' else 'HTTP 400')
+        mappings = [
+            {
+                'v1_component': {'referenceId': 'ref-1', 'name': 'Old Comp 1'},
+                'v2_component': {'referenceId': 'v2-ref-1', 'name': 'New Comp 1'},
+                'risk_patterns': [{'id': 'rp-1', 'name': 'RP 1'}, {'id': 'rp-bad', 'name': 'RP Bad'}]
+            },
+            {
+                'v1_component': {'referenceId': 'ref-2', 'name': 'Old Comp 2'},
+                'v2_component': {'referenceId': 'v2-ref-2', 'name': 'New Comp 2'},
+                'risk_patterns': [{'id': 'rp-2', 'name': 'RP 2'}]
+            },
+            {
+                'v1_component': {'referenceId': 'ref-missing'},
+                'v2_component': {'referenceId': 'v2-ref-3', 'name': 'New Comp 3'},
+                'risk_patterns': [{'id': 'rp-3', 'name': 'RP 3'}]
+            }
+        ]
+        v1_lookup = {'ref-1': {'id': 'uuid-1'}, 'ref-2': {'id': 'uuid-2'}}
+        
+        results = phase4b.transfer_risk_patterns(mappings, v1_lookup, MagicMock(), max_workers=4)
+        
+        self.assertEqual([r['status'] for r in results], ['PARTIAL', 'COMPLETED', 'FAILED'])
+        self.assertEqual([t['risk_pattern_id'] for t in results[0]['transfers']], ['rp-1', 'rp-bad'])
+        self.assertEqual(results[0]['failed_transfers'], 1)
+        self.assertEqual(mock_add.call_count, 3)
+    
+    @patch('phase4b_transfer_risk_patterns.add_risk_pattern_to_component')
+    def test_transfer_risk_patterns_resumes_from_journal(self, mock_add):
+        """Test that a rerun skips risk patterns the journal records as transferred"""
+        import phase4b_transfer_risk_patterns as phase4b
+        from migration_journal import MigrationJournal
+        
+        mock_add.return_value = (True, None)
+        mappings = [{
+            'v1_component': {'referenceId': 'ref-1', 'name': 'Old Comp 1'},
+            'v2_component': {'referenceId': 'v2-ref-1', 'name': 'New Comp 1'},
+            'risk_patterns': [{'id': 'rp-1', 'name': 'RP 1'}, {'id': 'rp-2', 'name': 'RP 2'}]
+        }]
+        v1_lookup = {'ref-1': {'id': 'uuid-1'}}
+        
+        with MigrationJournal('journal.jsonl') as journal:
+            journal.record('transfer', 'ref-1', 'rp-1', True, risk_pattern_name='RP 1')
+        
+        with MigrationJournal('journal.jsonl') as journal:
+            results = phase4b.transfer_risk_patterns(mappings, v1_lookup, MagicMock(), journal=journal)
+        
+        mock_add.assert_called_once_with('uuid-1', 'rp-2', 'RP 2', unittest.mock.ANY)
+        self.assertEqual(results[0]['status'], 'COMPLETED')
+        self.assertEqual(results[0]['successful_transfers'], 2)
+        
+        # A later removal makes the pattern eligible for transfer again
+        with MigrationJournal('journal.jsonl') as journal:
+            journal.record('remove', 'ref-1', 'rp-1', True)
+            self.assertFalse(journal.is_done('transfer', 'ref-1', 'rp-1'))
+            self.assertTrue(journal.is_done('transfer', 'ref-1', 'rp-2'))
 
 
 class TestUtilityFunctions(unittest.TestCase):
@@ -589,6 +737,63 @@ class TestUtilityFunctions(unittest.TestCase):
             shutil.rmtree(test_dir, ignore_errors=True)
 
 
+class TestRateLimiterUnits(unittest.TestCase):
+    """Unit tests for the shared adaptive rate limiter"""
+    
+    def test_parse_retry_after(self):
+        """Test Retry-After parsing for seconds, dates and bad values"""
+        import rate_limiter
+        
+        self.assertEqual(rate_limiter.parse_retry_after('3'), 3.0)
+        self.assertEqual(rate_limiter.parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0.0)
+        self.assertIsNone(rate_limiter.parse_retry_after(None))
+        self.assertIsNone(rate_limiter.parse_retry_after('soon'))
+    
+    def test_backoff_and_ramp_up(self):
+        """Test that throttling halves the rate and healthy responses restore it"""
+        import rate_limiter
+        
+        limiter = rate_limiter.AdaptiveRateLimiter(rate=10)
+        limiter.record(429, '0')
+        self.assertEqual(limiter.rate, 5)
+        
+        for _ in range(rate_limiter.RAMP_UP_AFTER * 10):
+            limiter.record(200)
+        self.assertEqual(limiter.rate, 10)
+
+    def test_pause_without_retry_after_doubles(self):
+        """Test that throttles without Retry-After back off exponentially until a healthy response"""
+        import time
+        import rate_limiter
+
+        limiter = rate_limiter.AdaptiveRateLimiter(rate=100)
+        pauses = []
+        for _ in range(3):
+            limiter.paused_until = 0.0
+            limiter.record(503)
+            pauses.append(round(limiter.paused_until - time.monotonic()))
+        self.assertEqual(pauses, [2, 4, 8])
+
+        limiter.record(200)
+        limiter.paused_until = 0.0
+        limiter.record(503)
+        self.assertEqual(round(limiter.paused_until - time.monotonic()), 2)
+
+    def test_limited_request_retries_throttled(self):
+        """Test that limited_request retries 429 responses and returns the final one"""
+        import rate_limiter
+        
+        throttled = MagicMock(status_code=429, headers={'Retry-After': '0'})
+        ok = MagicMock(status_code=201, headers={})
+        send = MagicMock(side_effect=[throttled, ok])
+        
+        limiter = rate_limiter.AdaptiveRateLimiter(rate=100)
+        response = rate_limiter.limited_request(send, limiter)
+        
+        self.assertIs(response, ok)
+        self.assertEqual(send.call_count, 2)
+
+
 if __name__ == '__main__':
     # Run the tests
     unittest.main(verbosity=2)
\ No newline at end of file